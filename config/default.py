@@ -28,6 +28,9 @@ import os
 from diablo.jobs.admin_emails_job import AdminEmailsJob
 from diablo.jobs.dblink_to_redshift_job import DblinkToRedshiftJob
 
+# Each process keeps an in-memory roster of admin users, reloaded after this many seconds.
+ADMIN_USERS_CACHE_TIMEOUT = 60
+
 # Base directory for the application (one level up from this config file).
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
@@ -42,10 +45,44 @@ CAS_SERVER = 'https://auth-test.berkeley.edu/cas/'
 COURSE_CAPTURE_EXPLAINED_URL = 'https://www.ets.berkeley.edu/services-facilities/course-capture'
 COURSE_CAPTURE_POLICIES_URL = 'https://www.ets.berkeley.edu/services-facilities/course-capture/course-capture-instructors-getting-started/policies'
 
+# Course feeds are cached per term version (see TermVersion), so they never go stale. Still, every bump of the version
+# orphans the cached feeds of the term. Keep the timeout short so that dead versions expire before crowding out live
+# entries of the cache.
+COURSE_FEED_CACHE_TIMEOUT = 300
+
+# When true, course feeds are assembled as JSON documents by Postgres (json_agg and lateral subqueries) rather than
+# by Python. See scripts/benchmark_course_feeds.py.
+COURSE_FEED_JSON_AGGREGATION = False
+
+# Unpaginated course feeds are streamed, one batch of sections at a time, if COURSE_FEED_STREAMING is true.
+COURSE_FEED_STREAM_BATCH_SIZE = 500
+COURSE_FEED_STREAMING = False
+
 CACHE_DEFAULT_TIMEOUT = 86400
 CACHE_DIR = f'{BASE_DIR}/.flask_cache'
-CACHE_THRESHOLD = 300
-CACHE_TYPE = 'filesystem'
+# Keys that match these patterns are also cached in-process, in a bounded LRU, in front of the shared
+# CACHE_SHARED_TYPE backend. Local entries expire after 'timeout' seconds (or sooner, per the shared timeout) so that
+# writes by other processes become visible. See diablo/lib/tiered_cache.py and scripts/benchmark_cache.py.
+CACHE_LOCAL_TIERS = {
+    'calnet/user_for_uid_{uid}': {'max_size': 5000, 'timeout': 300},
+    'canvas/canvas_course_sites': {'max_size': 1, 'timeout': 60},
+    'kaltura/get_resource_list': {'max_size': 1, 'timeout': 30},
+}
+# Keys of the shared cache are prefixed with this namespace. If None then it is derived from app version, build summary
+# and DB schema, so that a deploy starts afresh while workers of the same deploy share entries across restarts.
+CACHE_NAMESPACE = None
+# Seconds that a cachified None (e.g., a uid unknown to CalNet) is cached. Zero or None disables negative caching.
+CACHE_NEGATIVE_TIMEOUT = 300
+CACHE_SHARED_TYPE = 'filesystem'
+# When a cachify key expires, only one process recomputes it while the others wait, for up to this many seconds, on a
+# lock in the shared cache. Zero or None disables the lock; threads of a process are coalesced regardless.
+CACHE_SINGLE_FLIGHT_LOCK_TIMEOUT = 30
+# Max number of files in CACHE_DIR before pruning. Allow for a few thousand per-uid CalNet entries.
+CACHE_THRESHOLD = 10000
+# Per-key-pattern overrides of cachify timeouts. For example:
+#   {'calnet/user_for_uid_{uid}': {'timeout': 1440, 'negative_timeout': 3600}}
+CACHE_TIMEOUTS = {}
+CACHE_TYPE = 'diablo.lib.tiered_cache.tiered'
 
 CANVAS_ACCESS_TOKEN = 'a token'
 CANVAS_API_URL = 'https://hard_knocks_api.instructure.com'
@@ -100,6 +137,9 @@ INACTIVE_SESSION_LIFETIME = 20
 # These "INDEX_HTML" defaults are good in diablo-[dev|qa|prod]. See development.py for local configs.
 INDEX_HTML = 'dist/static/index.html'
 
+# Nightly sync (DblinkToRedshiftJob) fetches CalNet profiles of new instructors and of those not updated in this many days.
+INSTRUCTOR_SYNC_MAX_AGE_DAYS = 7
+
 KALTURA_ADMIN_SECRET = 'secret'
 KALTURA_UNIQUE_USER_ID = 'user_id'
 KALTURA_PARTNER_ID = '0000000'
@@ -110,6 +150,13 @@ KALTURA_RECORDING_OFFSET_END = 2
 LDAP_HOST = 'ldap-test.berkeley.edu'
 LDAP_BIND = 'mybind'
 LDAP_PASSWORD = 'secret'
+# Bound LDAP connections are kept for reuse, up to LDAP_POOL_SIZE per process. Connections idle for longer than
+# LDAP_POOL_IDLE_TIMEOUT seconds are closed rather than reused.
+LDAP_POOL_IDLE_TIMEOUT = 300
+LDAP_POOL_SIZE = 4
+# Batches of a large uid search (e.g., the instructor refresh of DblinkToRedshiftJob) run concurrently, in this many
+# threads. Keep it no greater than LDAP_POOL_SIZE.
+LDAP_SEARCH_MAX_WORKERS = 4
 
 # Logging
 LOGGING_FORMAT = '[%(asctime)s] - %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
@@ -23,10 +23,14 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 ENHANCEMENTS, OR MODIFICATIONS.
 """
 
+import copy
 from os.path import dirname
+from threading import Event, Lock
+import time
 
 from decorator import decorator
 from diablo.jobs.background_job_manager import BackgroundJobManager
+from diablo.lib import cache_stats
 from diablo.lib.util import get_args_dict
 from flask import current_app as app
 from flask_caching import Cache
@@ -69,22 +73,172 @@ def std_commit(allow_test_environment=False):
             db.session.close()
 
 
+# Cached in place of None, which the cache backend cannot tell apart from a miss.
+NEGATIVE_CACHE_SENTINEL = '__diablo_negative_cache_sentinel__'
+
+
 def cachify(key_pattern, timeout=1440):
     @decorator
     def _cachify(func, *args, **kw):
         args_dict = get_args_dict(func, *args, **kw)
         key = key_pattern.format(**args_dict)
-        cached = cache.get(key)
+        cached = _get_many(key_pattern, key)[0]
         if cached is None:
-            cached = func(*args, **kw)
-            cache.set(key, cached, timeout)
-        return cached
-
+            cache_stats.increment(key_pattern, 'misses')
+            # Concurrent misses of the same key wait for a single call to func.
+            return _single_flight(key, lambda: _get_or_compute(key_pattern, key, lambda: func(*args, **kw), timeout))
+        cache_stats.increment(key_pattern, 'hits')
+        return None if is_negative_cache_sentinel(cached) else cached
     return _cachify
 
 
+def cachify_many(key_pattern, items_arg, item_arg, timeout=1440):
+    """Bulk companion of cachify, sharing its cache keys, for a function that takes a list of items and returns a dict.
+
+    The items_arg list is deduped and its cache keys, per key_pattern with item_arg bound to each item, are read in one
+    multi-get. The decorated function is called once, with the misses only, and its results are written back in one
+    multi-set. Items missing from its dict are negatively cached. The result is a dict with a value (or None) per item.
+    """
+    @decorator
+    def _cachify_many(func, *args, **kw):
+        args_dict = get_args_dict(func, *args, **kw)
+        items = list(dict.fromkeys(args_dict[items_arg]))
+        if not items:
+            return {}
+        keys = [key_pattern.format(**{**args_dict, item_arg: item}) for item in items]
+        values_per_item = {}
+        uncached_items = []
+        for item, cached in zip(items, _get_many(key_pattern, *keys)):
+            if cached is None:
+                uncached_items.append(item)
+            else:
+                values_per_item[item] = None if is_negative_cache_sentinel(cached) else cached
+        cache_stats.increment(key_pattern, 'hits', len(values_per_item))
+        if uncached_items:
+            cache_stats.increment(key_pattern, 'misses', len(uncached_items))
+            start = time.perf_counter()
+            loaded = func(**{**args_dict, items_arg: uncached_items})
+            cache_stats.observe(key_pattern, 'computeMs', time.perf_counter() - start)
+            positive_timeout, negative_timeout = get_cache_timeouts(key_pattern, timeout)
+            found, not_found = {}, {}
+            for item in uncached_items:
+                key = key_pattern.format(**{**args_dict, item_arg: item})
+                value = loaded.get(item)
+                if value is None:
+                    not_found[key] = NEGATIVE_CACHE_SENTINEL
+                else:
+                    found[key] = value
+                values_per_item[item] = value
+            if found:
+                cache.set_many(found, timeout=positive_timeout)
+                cache_stats.increment(key_pattern, 'sets', len(found))
+            if not_found and negative_timeout:
+                cache.set_many(not_found, timeout=negative_timeout)
+                cache_stats.increment(key_pattern, 'sets', len(not_found))
+        return dict((item, values_per_item[item]) for item in items)
+    return _cachify_many
+
+
+def get_cache_timeouts(key_pattern, timeout=1440):
+    """Return timeouts of found and of not-found (None) values, overridden per key pattern by CACHE_TIMEOUTS."""
+    overrides = app.config['CACHE_TIMEOUTS'].get(key_pattern, {})
+    return overrides.get('timeout', timeout), overrides.get('negative_timeout', app.config['CACHE_NEGATIVE_TIMEOUT'])
+
+
+def is_negative_cache_sentinel(value):
+    return isinstance(value, str) and value == NEGATIVE_CACHE_SENTINEL
+
+
+def set_cached(key_pattern, key, value, timeout=1440):
+    positive_timeout, negative_timeout = get_cache_timeouts(key_pattern, timeout)
+    if value is not None:
+        cache.set(key, value, positive_timeout)
+        cache_stats.increment(key_pattern, 'sets')
+    elif negative_timeout:
+        cache.set(key, NEGATIVE_CACHE_SENTINEL, negative_timeout)
+        cache_stats.increment(key_pattern, 'sets')
+
+
 def skip_when_pytest():
     @decorator
     def _skip_when_pytest(func, *args, **kw):
         return None if app.config['DIABLO_ENV'] == 'test' else func(*args, **kw)
     return _skip_when_pytest
+
+
+class _Flight:
+
+    def __init__(self):
+        self.done = Event()
+        self.error = None
+        self.result = None
+
+
+# In-process calls in flight, per cache key.
+_flights = {}
+_flights_lock = Lock()
+
+
+def _get_many(key_pattern, *keys):
+    start = time.perf_counter()
+    values = cache.get_many(*keys)
+    cache_stats.observe(key_pattern, 'getMs', time.perf_counter() - start)
+    return values
+
+
+def _get_or_compute(key_pattern, key, compute, timeout):
+    # The value may have been cached since the caller's miss, by a flight that has just landed or by another process.
+    cached = cache.get(key)
+    if cached is not None:
+        return None if is_negative_cache_sentinel(cached) else cached
+    lock_key = f'cachify_lock/{key}'
+    lock_timeout = app.config['CACHE_SINGLE_FLIGHT_LOCK_TIMEOUT']
+    # The filesystem backend's add() ignores expiry. Calling the backend's has() first purges a lock left behind by a
+    # process that died mid-compute.
+    is_locked = bool(lock_timeout) and not cache.cache.has(lock_key) and cache.add(lock_key, True, timeout=lock_timeout)
+    if lock_timeout and not is_locked:
+        # Another process holds the lock. Wait for its value; if the lock is released or expires first then compute.
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            cached = cache.get(key)
+            if cached is not None:
+                return None if is_negative_cache_sentinel(cached) else cached
+            if not cache.cache.has(lock_key):
+                break
+    try:
+        start = time.perf_counter()
+        value = compute()
+        cache_stats.observe(key_pattern, 'computeMs', time.perf_counter() - start)
+        set_cached(key_pattern, key, value, timeout)
+    finally:
+        if is_locked:
+            cache.delete(lock_key)
+    return value
+
+
+def _single_flight(key, compute):
+    with _flights_lock:
+        flight = _flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _flights[key] = _Flight()
+    if is_leader:
+        try:
+            flight.result = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with _flights_lock:
+                del _flights[key]
+            flight.done.set()
+        return flight.result
+    flight.done.wait()
+    if flight.error:
+        raise flight.error
+    # The leader's result is not to be shared, since callers may mutate it. Prefer a cached copy.
+    cached = cache.get(key)
+    if cached is not None:
+        return None if is_negative_cache_sentinel(cached) else cached
+    return copy.deepcopy(flight.result)
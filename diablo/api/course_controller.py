@@ -24,14 +24,16 @@ ENHANCEMENTS, OR MODIFICATIONS.
 """
 
 from diablo.api.errors import BadRequestError, ForbiddenRequestError, ResourceNotFoundError
-from diablo.api.util import admin_required, get_search_filter_options
+from diablo.api.util import admin_required, get_page, get_search_filter_options
 from diablo.lib.berkeley import term_name_for_sis_id
-from diablo.lib.http import tolerant_jsonify
+from diablo.lib.http import conditional_jsonify, stream_jsonify, tolerant_jsonify
 from diablo.merged.emailer import notify_instructors_of_approval
 from diablo.models.approval import Approval, get_all_publish_types, get_all_recording_types
 from diablo.models.course_preference import CoursePreference
+from diablo.models.course_status import CourseStatus
 from diablo.models.room import Room
 from diablo.models.sis_section import SisSection
+from diablo.models.term_version import TermVersion
 from flask import current_app as app, request
 from flask_login import current_user, login_required
 
@@ -84,44 +86,66 @@ def approve():
 @app.route('/api/course/<term_id>/<section_id>')
 @login_required
 def get_course(term_id, section_id):
-    course = SisSection.get_course(term_id, section_id)
-    if not course:
-        raise ResourceNotFoundError(f'No section for term_id = {term_id} and section_id = {section_id}')
-
-    if not current_user.is_admin and current_user.uid not in [i['uid'] for i in course['instructors']]:
-        raise ForbiddenRequestError(f'Sorry, you are unauthorized to view the course {course["label"]}.')
-    return tolerant_jsonify(course)
-
-
-@app.route('/api/courses', methods=['POST'])
+    def _get_course():
+        course = SisSection.get_course(term_id, section_id)
+        if not course:
+            raise ResourceNotFoundError(f'No section for term_id = {term_id} and section_id = {section_id}')
+        if not current_user.is_admin and current_user.uid not in [i['uid'] for i in course['instructors']]:
+            raise ForbiddenRequestError(f'Sorry, you are unauthorized to view the course {course["label"]}.')
+        return course
+
+    if current_user.is_admin:
+        return conditional_jsonify(TermVersion.get_version(term_id), _get_course)
+    # Instructors must be authorized before a '304 Not Modified' is revealed. The course is assembled once.
+    course = _get_course()
+    return conditional_jsonify(TermVersion.get_version(term_id), lambda: course)
+
+
+@app.route('/api/courses', methods=['GET', 'POST'])
 @admin_required
 def find_courses():
-    params = request.get_json()
+    # The front end polls with GET and query-string params, which gets an ETag and '304 Not Modified'. Clients do not
+    # send If-None-Match with a POST.
+    params = request.args if request.method == 'GET' else request.get_json()
     term_id = params.get('termId')
     filter_ = params.get('filter', 'Not Invited')
-    if filter_ not in get_search_filter_options() or not term_id:
+    if filter_ not in get_search_filter_options() or not str(term_id).isdigit():
         raise BadRequestError('One or more required params are missing or invalid')
 
-    if filter_ == 'Do Not Email':
-        courses = SisSection.get_courses_opted_out(term_id)
-    elif filter_ == 'Invited':
-        courses = SisSection.get_courses_invited(term_id)
-    elif filter_ == 'Not Invited':
-        courses = SisSection.get_eligible_courses_not_invited(term_id)
-    elif filter_ == 'Partially Approved':
-        courses = SisSection.get_courses_partially_approved(term_id)
-    elif filter_ == 'Scheduled':
-        courses = SisSection.get_courses_scheduled(term_id)
-    else:
-        raise BadRequestError(f'Invalid filter: {filter_}')
-
-    return tolerant_jsonify(courses)
+    page = get_page(params)
+    stream = not page and app.config['COURSE_FEED_STREAMING']
+
+    def _find_courses():
+        if filter_ == 'Do Not Email':
+            return SisSection.get_courses_opted_out(term_id, page=page, stream=stream)
+        elif filter_ == 'Invited':
+            return SisSection.get_courses_invited(term_id, page=page, stream=stream)
+        elif filter_ == 'Not Invited':
+            return SisSection.get_eligible_courses_not_invited(term_id, page=page, stream=stream)
+        elif filter_ == 'Partially Approved':
+            return SisSection.get_courses_partially_approved(term_id, page=page, stream=stream)
+        elif filter_ == 'Scheduled':
+            return SisSection.get_courses_scheduled(term_id, page=page, stream=stream)
+        else:
+            raise BadRequestError(f'Invalid filter: {filter_}')
+
+    if request.method == 'GET':
+        return conditional_jsonify(TermVersion.get_version(term_id), _find_courses)
+    courses = _find_courses()
+    return stream_jsonify(courses) if stream else tolerant_jsonify(courses)
+
+
+@app.route('/api/courses/counts/<int:term_id>')
+@admin_required
+def course_counts(term_id):
+    index = CourseStatus.get_index(term_id)
+    return tolerant_jsonify(dict((filter_, index.count(filter_)) for filter_ in get_search_filter_options().keys()))
 
 
 @app.route('/api/courses/changes/<term_id>')
 @admin_required
 def course_changes(term_id):
-    return tolerant_jsonify(SisSection.get_course_changes(term_id))
+    return tolerant_jsonify(SisSection.get_course_changes(term_id, page=get_page(request.args)))
 
 
 @app.route('/api/course/opt_out/update', methods=['POST'])
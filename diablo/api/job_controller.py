@@ -29,6 +29,7 @@ from diablo.jobs.canvas_job import CanvasJob
 from diablo.jobs.dblink_to_redshift_job import DblinkToRedshiftJob
 from diablo.jobs.kaltura_job import KalturaJob
 from diablo.jobs.queued_emails_job import QueuedEmailsJob
+from diablo.lib.cache_stats import get_cache_stats
 from diablo.lib.http import tolerant_jsonify
 from diablo.models.job_history import JobHistory
 from flask import current_app as app
@@ -62,6 +63,13 @@ def job_history(day_count):
         _raise_error()
 
 
+@app.route('/api/cache/stats')
+@admin_required
+def cache_stats():
+    # Counters and latencies of cachify, per key pattern, since startup of the worker process that serves the request.
+    return tolerant_jsonify(get_cache_stats())
+
+
 @app.route('/api/jobs/available')
 @admin_required
 def available_jobs():
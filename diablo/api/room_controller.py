@@ -25,9 +25,10 @@ ENHANCEMENTS, OR MODIFICATIONS.
 
 from diablo.api.errors import BadRequestError, ResourceNotFoundError
 from diablo.api.util import admin_required
-from diablo.lib.http import tolerant_jsonify
+from diablo.lib.http import conditional_jsonify, tolerant_jsonify
 from diablo.models.room import Room
 from diablo.models.sis_section import SisSection
+from diablo.models.term_version import TermVersion
 from flask import current_app as app, request
 
 
@@ -40,16 +41,17 @@ def get_all_rooms():
 @app.route('/api/room/<room_id>')
 @admin_required
 def get_room(room_id):
-    room = Room.get_room(room_id)
-    if room:
-        api_json = room.to_api_json()
-        api_json['courses'] = SisSection.get_courses_per_location(
-            term_id=app.config['CURRENT_TERM_ID'],
-            location=room.location,
-        )
-        return tolerant_jsonify(api_json)
-    else:
-        raise ResourceNotFoundError('No such room')
+    term_id = app.config['CURRENT_TERM_ID']
+
+    def _get_room_feed():
+        room = Room.get_room(room_id)
+        if room:
+            api_json = room.to_api_json()
+            api_json['courses'] = SisSection.get_courses_per_location(term_id=term_id, location=room.location)
+            return api_json
+        else:
+            raise ResourceNotFoundError('No such room')
+    return conditional_jsonify(TermVersion.get_version(term_id), _get_room_feed)
 
 
 @app.route('/api/room/auditorium', methods=['POST'])
@@ -25,6 +25,8 @@ ENHANCEMENTS, OR MODIFICATIONS.
 
 from functools import wraps
 
+from diablo.api.errors import BadRequestError
+from diablo.lib.util import decode_cursor
 from flask import current_app as app, request
 from flask_login import current_user
 
@@ -48,3 +50,30 @@ def get_search_filter_options():
         'Partially Approved': 'Eligible courses (received invitation) with some but not all necessary approvals.',
         'Scheduled': 'Courses with scheduled recordings.',
     }
+
+
+def get_page(params):
+    # Keyset pagination is opt-in: without 'limit' or 'cursor' params the caller gets the full, unpaginated feed.
+    limit = params.get('limit')
+    cursor = params.get('cursor')
+    if limit is None and cursor is None:
+        return None
+    try:
+        limit = int(limit) if limit is not None else app.config['SEARCH_ITEMS_PER_PAGE']
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise BadRequestError('Invalid pagination params')
+    if limit < 1 or (after is not None and not _is_valid_keyset(after)):
+        raise BadRequestError('Invalid pagination params')
+    return {
+        'after': after,
+        'limit': limit,
+    }
+
+
+def _is_valid_keyset(after):
+    # Per encode_cursor in course feeds: [course_title, section_id] where course_title may be null.
+    if len(after) != 2:
+        return False
+    course_title, section_id = after
+    return (course_title is None or isinstance(course_title, str)) and isinstance(section_id, int) and not isinstance(section_id, bool)
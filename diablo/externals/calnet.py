@@ -23,9 +23,14 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 ENHANCEMENTS, OR MODIFICATIONS.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import ssl
+import threading
+import time
 
 import ldap3
+from ldap3.core.exceptions import LDAPBindError, LDAPCommunicationError
 
 SCHEMA_DICT = {
     'berkeleyEduAffiliations': 'affiliations',
@@ -44,8 +49,16 @@ SCHEMA_DICT = {
     'uid': 'uid',
 }
 
+# Only attributes of SCHEMA_DICT are requested.
+SEARCH_ATTRIBUTES = list(SCHEMA_DICT.keys())
+
 BATCH_QUERY_MAXIMUM = 500
 
+# Servers and connection pools are shared by all clients of the process, keyed by host and by (host, bind).
+_connection_pools = {}
+_servers = {}
+_lock = threading.Lock()
+
 
 def client(app):
     return Client(app)
@@ -57,24 +70,58 @@ class Client:
         self.host = app.config['LDAP_HOST']
         self.bind = app.config['LDAP_BIND']
         self.password = app.config['LDAP_PASSWORD']
-        tls = ldap3.Tls(validate=ssl.CERT_REQUIRED)
-        server = ldap3.Server(self.host, port=636, use_ssl=True, get_info=ldap3.ALL, tls=tls)
-        self.server = server
+        self.logger = app.logger
+        self.max_workers = app.config['LDAP_SEARCH_MAX_WORKERS']
+        self.server = _get_server(self.host)
+        self.pool = _get_connection_pool(self)
 
     def connect(self):
-        conn = ldap3.Connection(self.server, user=self.bind, password=self.password, auto_bind=ldap3.AUTO_BIND_TLS_BEFORE_BIND)
+        conn = ldap3.Connection(self.server, user=self.bind, password=self.password, auto_bind=ldap3.AUTO_BIND_NONE)
+        conn.open(read_server_info=False)
+        conn.start_tls(read_server_info=False)
+        # The server object is reused, so its schema and DSA info are fetched by the first bind only.
+        if not conn.bind(read_server_info=self.server.schema is None):
+            conn.unbind()
+            raise LDAPBindError(f'LDAP bind failed: {conn.last_error}')
         return conn
 
     def search_uids(self, uids, search_expired=False):
+        batches = [uids[i:i + BATCH_QUERY_MAXIMUM] for i in range(0, len(uids), BATCH_QUERY_MAXIMUM)]
+
+        def _search_batch(index):
+            start = time.monotonic()
+            search_filter = self._ldap_search_filter(batches[index], 'uid', search_expired)
+            out = [_attributes_to_dict(entry, search_expired) for entry in self._search(search_filter)]
+            if len(batches) > 1:
+                elapsed = time.monotonic() - start
+                self.logger.info(f'CalNet batch {index + 1} of {len(batches)}: {len(out)} of {len(batches[index])} uids found in {elapsed:.2f}s')
+            return out
+
         all_out = []
-        for i in range(0, len(uids), BATCH_QUERY_MAXIMUM):
-            uids_batch = uids[i:i + BATCH_QUERY_MAXIMUM]
-            with self.connect() as conn:
-                search_filter = self._ldap_search_filter(uids_batch, 'uid', search_expired)
-                conn.search('dc=berkeley,dc=edu', search_filter, attributes=ldap3.ALL_ATTRIBUTES)
-                all_out += [_attributes_to_dict(entry, search_expired) for entry in conn.entries]
+        if len(batches) > 1 and self.max_workers > 1:
+            # Each thread borrows its own connection from the pool. Results keep the order of batches.
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for out in executor.map(_search_batch, range(len(batches))):
+                    all_out += out
+        else:
+            for index in range(len(batches)):
+                all_out += _search_batch(index)
         return all_out
 
+    def _search(self, search_filter):
+        try:
+            with self.pool.connection() as conn:
+                conn.search('dc=berkeley,dc=edu', search_filter, attributes=SEARCH_ATTRIBUTES)
+                return conn.entries
+        except LDAPCommunicationError as e:
+            # The pooled connection went stale (e.g., closed by the server), and so probably did its idle peers. Drop them
+            # and retry once, on a freshly bound connection.
+            self.logger.warning(f'LDAP connection failed, will rebind and retry: {e}')
+            self.pool.close_all()
+            with self.pool.connection(fresh=True) as conn:
+                conn.search('dc=berkeley,dc=edu', search_filter, attributes=SEARCH_ATTRIBUTES)
+                return conn.entries
+
     @classmethod
     def _ldap_search_filter(cls, ids, id_type, search_expired=False):
         ids_filter = ''.join(f'({id_type}={_id})' for _id in ids)
@@ -90,6 +137,80 @@ class Client:
         )"""
 
 
+class ConnectionPool:
+    """Bound connections, kept for reuse. A connection that fails mid-operation is discarded, never returned to the pool."""
+
+    def __init__(self, connect, size, idle_timeout):
+        self.connect = connect
+        self.idle_timeout = idle_timeout
+        self.size = size
+        # Idle connections, each paired with the time it was returned to the pool.
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, fresh=False):
+        conn = self.connect() if fresh else self._acquire()
+        try:
+            yield conn
+        except Exception:
+            _close(conn)
+            raise
+        self._release(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, released_at in idle:
+            _close(conn)
+
+    def _acquire(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            if conn.bound and not conn.closed and now - released_at < self.idle_timeout:
+                return conn
+            _close(conn)
+        return self.connect()
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        _close(conn)
+
+
+def _close(conn):
+    try:
+        conn.unbind()
+    except Exception:
+        pass
+
+
+def _get_connection_pool(calnet_client):
+    key = (calnet_client.host, calnet_client.bind)
+    with _lock:
+        if key not in _connection_pools:
+            _connection_pools[key] = ConnectionPool(
+                connect=calnet_client.connect,
+                size=calnet_client.app.config['LDAP_POOL_SIZE'],
+                idle_timeout=calnet_client.app.config['LDAP_POOL_IDLE_TIMEOUT'],
+            )
+        return _connection_pools[key]
+
+
+def _get_server(host):
+    with _lock:
+        if host not in _servers:
+            tls = ldap3.Tls(validate=ssl.CERT_REQUIRED)
+            _servers[host] = ldap3.Server(host, port=636, use_ssl=True, get_info=ldap3.ALL, tls=tls)
+        return _servers[host]
+
+
 def _attributes_to_dict(entry, expired_per_ldap):
     out = dict.fromkeys(SCHEMA_DICT.values(), None)
     out['expired'] = expired_per_ldap
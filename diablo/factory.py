@@ -23,7 +23,10 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 ENHANCEMENTS, OR MODIFICATIONS.
 """
 
-from diablo import background_job_manager, cache, db
+import hashlib
+import json
+
+from diablo import __version__, background_job_manager, cache, db
 from diablo.configs import load_configs
 from diablo.logger import initialize_logger
 from diablo.routes import register_routes
@@ -35,8 +38,9 @@ def create_app():
     app = Flask(__name__.split('.')[0])
     load_configs(app)
     initialize_logger(app)
+    if not app.config['CACHE_NAMESPACE']:
+        app.config['CACHE_NAMESPACE'] = _get_cache_namespace(app)
     cache.init_app(app)
-    cache.clear()
     db.init_app(app)
 
     if app.config['JOB_MANAGER']['auto_start']:
@@ -46,3 +50,16 @@ def create_app():
         register_routes(app)
 
     return app
+
+
+def _get_cache_namespace(app):
+    # Entries cached by a previous deploy may not fit the current code or schema. Rather than clearing the shared
+    # cache at startup of every worker, key it per deploy.
+    fingerprint = [__version__]
+    for relative_path in ['config/build-summary.json', 'scripts/db/schema.sql']:
+        try:
+            with open(f"{app.config['BASE_DIR']}/{relative_path}", 'rb') as file:
+                fingerprint.append(hashlib.sha1(file.read()).hexdigest())
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return hashlib.sha1(json.dumps(fingerprint).encode()).hexdigest()[:12]
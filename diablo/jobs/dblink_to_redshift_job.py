@@ -25,10 +25,11 @@ ENHANCEMENTS, OR MODIFICATIONS.
 from diablo.externals.rds import execute
 from diablo.jobs.background_job_manager import BackgroundJobError
 from diablo.jobs.base_job import BaseJob
-from diablo.jobs.util import insert_or_update_instructors, refresh_rooms
+from diablo.jobs.util import insert_or_update_instructors, refresh_admin_user_profiles, refresh_rooms
 from diablo.lib.db import resolve_sql_template
+from diablo.models.course_status import CourseStatus
 from diablo.models.cross_listing import CrossListing
-from diablo.models.sis_section import SisSection
+from diablo.models.instructor import Instructor
 from flask import current_app as app
 
 
@@ -37,14 +38,22 @@ class DblinkToRedshiftJob(BaseJob):
     def run(self, args=None):
         resolved_ddl_rds = resolve_sql_template('update_rds_sis_sections.template.sql')
         if execute(resolved_ddl_rds):
-            distinct_instructor_uids = SisSection.get_distinct_instructor_uids()
-            insert_or_update_instructors(distinct_instructor_uids)
-            app.logger.info(f'{len(distinct_instructor_uids)} instructors updated')
+            # CalNet is searched for new instructors and for those not updated recently. Load scales with churn.
+            max_age_days = app.config['INSTRUCTOR_SYNC_MAX_AGE_DAYS']
+            new_uids, stale_uids = Instructor.get_uids_to_sync(max_age_days=max_age_days)
+            if new_uids or stale_uids:
+                insert_or_update_instructors(new_uids + stale_uids)
+            app.logger.info(f'{len(new_uids)} new instructors inserted; {len(stale_uids)} instructors not updated in {max_age_days} days updated')
+            refresh_admin_user_profiles()
+            app.logger.info('Admin user profiles updated')
 
             term_id = app.config['CURRENT_TERM_ID']
             CrossListing.refresh(term_id=term_id)
             app.logger.info('\'cross_listings\' table refreshed')
 
+            CourseStatus.refresh(term_id=term_id)
+            app.logger.info('\'course_status\' table refreshed')
+
             refresh_rooms()
             app.logger.info('RDS indexes updated.')
         else:
@@ -22,6 +22,8 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 "AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
 ENHANCEMENTS, OR MODIFICATIONS.
 """
+import time
+
 from diablo.externals.kaltura import Kaltura
 from diablo.merged.calnet import get_calnet_users_for_uids
 from diablo.models.admin_user import AdminUser
@@ -32,9 +34,27 @@ from diablo.models.sis_section import SisSection
 from flask import current_app as app
 
 
+def refresh_admin_user_profiles():
+    # Names and emails of admins, for display of their approvals. See diablo.merged.user_profiles.
+    uids = list(AdminUser.get_admin_uids(include_deleted=True))
+    profiles = []
+    for calnet_user in get_calnet_users_for_uids(app=app, uids=uids).values():
+        profiles.append({
+            'email': calnet_user.get('campusEmail') or calnet_user.get('email'),
+            'first_name': calnet_user.get('firstName'),
+            'last_name': calnet_user.get('lastName'),
+            'uid': calnet_user['uid'],
+        })
+    AdminUser.update_profiles(profiles)
+
+
 def insert_or_update_instructors(instructor_uids):
+    # Batches of uids are searched concurrently. See LDAP_SEARCH_MAX_WORKERS.
+    start = time.monotonic()
+    calnet_users = get_calnet_users_for_uids(app=app, uids=instructor_uids)
+    app.logger.info(f'CalNet lookup of {len(instructor_uids)} instructors took {time.monotonic() - start:.2f}s')
     instructors = []
-    for instructor in get_calnet_users_for_uids(app=app, uids=instructor_uids).values():
+    for instructor in calnet_users.values():
         instructors.append({
             'dept_code': instructor.get('deptCode'),
             'email': instructor.get('campusEmail') or instructor.get('email'),
@@ -75,7 +95,7 @@ def get_courses_ready_to_schedule(approvals, term_id):
     if unscheduled_approvals:
         courses = SisSection.get_courses(section_ids=[a.section_id for a in unscheduled_approvals], term_id=term_id)
         courses_per_section_id = dict((int(course['sectionId']), course) for course in courses)
-        admin_user_uids = set([user.uid for user in AdminUser.all_admin_users(include_deleted=True)])
+        admin_user_uids = AdminUser.get_admin_uids(include_deleted=True)
 
         for section_id, uids in _get_uids_per_section_id(approvals=unscheduled_approvals).items():
             if admin_user_uids.intersection(set(uids)):
@@ -0,0 +1,108 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+import os
+from threading import Lock
+
+from diablo.lib.util import to_isoformat, utc_now
+
+"""In-process counters and latency histograms of cachify, per key pattern. Each worker process keeps its own."""
+
+# Upper bounds, in milliseconds, of histogram buckets. The last bucket is unbounded.
+HISTOGRAM_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+_lock = Lock()
+_since = utc_now()
+_stats_per_key_pattern = {}
+
+
+def get_cache_stats():
+    with _lock:
+        key_patterns = {}
+        for key_pattern, stats in sorted(_stats_per_key_pattern.items()):
+            lookups = stats['hits'] + stats['misses']
+            key_patterns[key_pattern] = {
+                **stats,
+                'computeMs': _histogram_to_api_json(stats['computeMs']),
+                'getMs': _histogram_to_api_json(stats['getMs']),
+                'hitRatio': round(stats['hits'] / lookups, 4) if lookups else None,
+            }
+        return {
+            'keyPatterns': key_patterns,
+            'pid': os.getpid(),
+            'since': to_isoformat(_since),
+        }
+
+
+def increment(key_pattern, counter, count=1):
+    """Counters are 'hits', 'misses' and 'sets' (by cachify) and 'localHits' and 'evictions' (by the local tier)."""
+    with _lock:
+        _get_stats(key_pattern)[counter] += count
+
+
+def observe(key_pattern, histogram, elapsed_seconds):
+    """Histograms are 'getMs', the latency of cache reads, and 'computeMs', the time spent by cachified functions."""
+    elapsed_ms = elapsed_seconds * 1000
+    with _lock:
+        counts = _get_stats(key_pattern)[histogram]
+        bucket_index = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if elapsed_ms <= bound), len(HISTOGRAM_BUCKETS_MS))
+        counts['buckets'][bucket_index] += 1
+        counts['count'] += 1
+        counts['totalMs'] += elapsed_ms
+
+
+def reset_cache_stats():
+    global _since
+    with _lock:
+        _stats_per_key_pattern.clear()
+        _since = utc_now()
+
+
+def _get_stats(key_pattern):
+    stats = _stats_per_key_pattern.get(key_pattern)
+    if stats is None:
+        stats = _stats_per_key_pattern[key_pattern] = {
+            'computeMs': _new_histogram(),
+            'evictions': 0,
+            'getMs': _new_histogram(),
+            'hits': 0,
+            'localHits': 0,
+            'misses': 0,
+            'sets': 0,
+        }
+    return stats
+
+
+def _histogram_to_api_json(histogram):
+    labels = [f'<={bound}' for bound in HISTOGRAM_BUCKETS_MS] + [f'>{HISTOGRAM_BUCKETS_MS[-1]}']
+    return {
+        'buckets': dict(zip(labels, histogram['buckets'])),
+        'count': histogram['count'],
+        'meanMs': round(histogram['totalMs'] / histogram['count'], 3) if histogram['count'] else None,
+    }
+
+
+def _new_histogram():
+    return {'buckets': [0] * (len(HISTOGRAM_BUCKETS_MS) + 1), 'count': 0, 'totalMs': 0.0}
@@ -23,9 +23,11 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 ENHANCEMENTS, OR MODIFICATIONS.
 """
 
+import hashlib
+import types
 import urllib
 
-from flask import Response
+from flask import request, Response, stream_with_context
 import simplejson as json
 
 
@@ -36,6 +38,33 @@ def add_param_to_url(url, param):
     return urllib.parse.urlunparse(parsed_url._replace(query=urllib.parse.urlencode(parsed_query)))
 
 
+def conditional_jsonify(data_version, get_obj):
+    """Respond with '304 Not Modified' if the client's copy, per If-None-Match, is current. Otherwise, get_obj() is called.
+
+    The strong ETag is derived from the request (path, query string and body) and from data_version, a fingerprint
+    that changes whenever the underlying data changes.
+    """
+    fingerprint = json.dumps([request.path, request.query_string.decode(), request.get_data(as_text=True), data_version])
+    etag = hashlib.sha1(fingerprint.encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        obj = get_obj()
+        response = stream_jsonify(obj) if isinstance(obj, types.GeneratorType) else tolerant_jsonify(obj)
+    response.set_etag(etag)
+    return response
+
+
+def stream_jsonify(objects, status=200, **kwargs):
+    """Stream a JSON array, encoding one element at a time as it is pulled from the 'objects' iterable."""
+    def _generate():
+        yield '['
+        for index, obj in enumerate(objects):
+            yield (',' if index else '') + json.dumps(obj, ignore_nan=True, separators=(',', ':'), **kwargs)
+        yield ']'
+    return Response(stream_with_context(_generate()), mimetype='application/json', status=status)
+
+
 def tolerant_jsonify(obj, status=200, **kwargs):
     content = json.dumps(obj, ignore_nan=True, separators=(',', ':'), **kwargs)
     return Response(content, mimetype='application/json', status=status)
@@ -0,0 +1,207 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+from collections import OrderedDict
+import pickle
+from threading import Lock
+import time
+
+from diablo.lib import cache_stats
+from flask_caching import backends
+from flask_caching.backends.base import BaseCache
+
+"""Two-level cache: a bounded, in-process LRU (per key pattern) in front of a shared Flask-Caching backend."""
+
+
+def tiered(app, config, args, kwargs):
+    """Flask-Caching factory, per CACHE_TYPE = 'diablo.lib.tiered_cache.tiered'. See CACHE_LOCAL_TIERS."""
+    shared = getattr(backends, config['CACHE_SHARED_TYPE'])(app, config, args, kwargs)
+    return TieredCache(
+        shared=shared,
+        local_tiers=config['CACHE_LOCAL_TIERS'],
+        default_timeout=config['CACHE_DEFAULT_TIMEOUT'],
+        namespace=config['CACHE_NAMESPACE'],
+    )
+
+
+class TieredCache(BaseCache):
+    """Keys that match a configured key pattern are read from an in-process LRU first, then from the shared backend.
+
+    Writes and deletes go to both levels, so a process sees its own writes. Other processes' writes become visible
+    once the local entry expires, which is why local timeouts should be short. Values are kept pickled in the LRU and
+    every hit returns a fresh copy: callers are free to mutate what they get.
+
+    Keys in the shared backend are prefixed with the namespace, if any. Entries of other namespaces (e.g., those of the
+    previous deploy) are ignored and left to expire.
+    """
+
+    def __init__(self, shared, local_tiers, default_timeout=300, namespace=None):
+        super().__init__(default_timeout=default_timeout)
+        self.shared = shared
+        self.namespace = namespace
+        # Longest prefix first, so that the most specific key pattern wins.
+        self._local_tiers = []
+        for key_pattern, options in sorted(local_tiers.items(), key=lambda item: -len(item[0].split('{')[0])):
+            self._local_tiers.append((
+                key_pattern.split('{')[0],
+                '{' in key_pattern,
+                _LocalTier(key_pattern=key_pattern, max_size=options['max_size'], timeout=options['timeout']),
+            ))
+
+    def add(self, key, value, timeout=None):
+        added = self.shared.add(self._namespaced(key), value, timeout)
+        local_tier = self._get_local_tier(key)
+        if local_tier:
+            if added:
+                local_tier.set(key, _dumps(value), self._normalize_timeout(timeout))
+            else:
+                local_tier.delete(key)
+        return added
+
+    def clear(self):
+        for _, __, local_tier in self._local_tiers:
+            local_tier.clear()
+        return self.shared.clear()
+
+    def dec(self, key, delta=1):
+        self._delete_local(key)
+        return self.shared.dec(self._namespaced(key), delta)
+
+    def delete(self, key):
+        self._delete_local(key)
+        return self.shared.delete(self._namespaced(key))
+
+    def delete_many(self, *keys):
+        # Not the shared backend's delete_many, which stops at the first key not found.
+        deleted = [self.delete(key) for key in keys]
+        return all(deleted)
+
+    def get(self, key):
+        return self.get_many(key)[0]
+
+    def get_many(self, *keys):
+        values = [None] * len(keys)
+        missing_indexes = []
+        for index, key in enumerate(keys):
+            local_tier = self._get_local_tier(key)
+            pickled = local_tier and local_tier.get(key)
+            if pickled is None:
+                missing_indexes.append(index)
+            else:
+                values[index] = pickle.loads(pickled)
+        if missing_indexes:
+            shared_values = self.shared.get_many(*[self._namespaced(keys[index]) for index in missing_indexes])
+            for index, value in zip(missing_indexes, shared_values):
+                values[index] = value
+                local_tier = value is not None and self._get_local_tier(keys[index])
+                if local_tier:
+                    # Expiry per the shared backend is unknown here. The local timeout applies.
+                    local_tier.set(keys[index], _dumps(value), 0)
+        return values
+
+    def has(self, key):
+        local_tier = self._get_local_tier(key)
+        return bool(local_tier and local_tier.get(key) is not None) or self.shared.has(self._namespaced(key))
+
+    def inc(self, key, delta=1):
+        self._delete_local(key)
+        return self.shared.inc(self._namespaced(key), delta)
+
+    def set(self, key, value, timeout=None):
+        return self.set_many({key: value}, timeout)
+
+    def set_many(self, mapping, timeout=None):
+        stored = self.shared.set_many(dict((self._namespaced(key), value) for key, value in mapping.items()), timeout)
+        timeout = self._normalize_timeout(timeout)
+        for key, value in mapping.items():
+            local_tier = self._get_local_tier(key)
+            if local_tier:
+                if stored:
+                    local_tier.set(key, _dumps(value), timeout)
+                else:
+                    local_tier.delete(key)
+        return stored
+
+    def _delete_local(self, key):
+        local_tier = self._get_local_tier(key)
+        if local_tier:
+            local_tier.delete(key)
+
+    def _namespaced(self, key):
+        return f'{self.namespace}/{key}' if self.namespace else key
+
+    def _get_local_tier(self, key):
+        for prefix, is_pattern, local_tier in self._local_tiers:
+            if key.startswith(prefix) if is_pattern else key == prefix:
+                return local_tier
+        return None
+
+
+class _LocalTier:
+
+    def __init__(self, key_pattern, max_size, timeout):
+        self.key_pattern = key_pattern
+        self.max_size = max_size
+        self.timeout = timeout
+        # Key to (expires_at, pickled value), least recently used first.
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, pickled = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        cache_stats.increment(self.key_pattern, 'localHits')
+        return pickled
+
+    def set(self, key, pickled, timeout):
+        # A timeout of zero means no expiry in the shared backend; the local entry expires all the same.
+        timeout = min(timeout, self.timeout) if timeout else self.timeout
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, pickled)
+            self._entries.move_to_end(key)
+            eviction_count = max(len(self._entries) - self.max_size, 0)
+            for _ in range(eviction_count):
+                self._entries.popitem(last=False)
+        if eviction_count:
+            cache_stats.increment(self.key_pattern, 'evictions', eviction_count)
+
+
+def _dumps(value):
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
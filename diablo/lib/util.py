@@ -22,8 +22,11 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 "AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
 ENHANCEMENTS, OR MODIFICATIONS.
 """
+import base64
 from datetime import datetime
+from functools import lru_cache
 import inspect
+import json
 import re
 
 from dateutil.tz import tzutc
@@ -32,6 +35,22 @@ import pytz
 """Generic utilities."""
 
 
+def decode_cursor(cursor):
+    # Inverse of encode_cursor. Raises ValueError if the cursor is malformed.
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (AttributeError, ValueError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    if not isinstance(values, list):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return values
+
+
+def encode_cursor(values):
+    # Opaque, URL-safe token that identifies the last item of a keyset-paginated page.
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
 def get_args_dict(func, *args, **kw):
     arg_names = inspect.getfullargspec(func)[0]
     resp = dict(zip(arg_names, args))
@@ -77,5 +96,7 @@ def format_days(days):
     return [(days[i:i + n]) for i in range(0, len(days), n)] if days else None
 
 
+@lru_cache(maxsize=4096)
 def format_time(military_time):
+    # Memoized: strptime is costly and a term has relatively few distinct meeting times.
     return datetime.strptime(military_time, '%H:%M').strftime('%I:%M %p').lower().lstrip('0') if military_time else None
@@ -23,22 +23,47 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 ENHANCEMENTS, OR MODIFICATIONS.
 """
 
-from diablo import cachify
+from diablo import cachify, cachify_many
 from diablo.api.errors import InternalServerError
 from diablo.externals import calnet
 
+USER_FOR_UID_CACHE_KEY = 'calnet/user_for_uid_{uid}'
+USER_FOR_UID_CACHE_TIMEOUT = 1440
+
 
-@cachify('calnet/user_for_uid_{uid}')
 def get_calnet_user_for_uid(app, uid):
-    users = _get_calnet_users(app, 'uid', [uid])
-    return users[uid] if users else None
+    return _get_known_calnet_user_for_uid(app, uid) or _unknown_user_feed('uid', uid)
+
+
+def get_cached_calnet_users_for_uids(app, uids):
+    # Bulk equivalent of get_calnet_user_for_uid, sharing its cache.
+    users_per_uid = _get_known_calnet_users_for_uids(app, uids)
+    return dict((uid, user or _unknown_user_feed('uid', uid)) for uid, user in users_per_uid.items())
 
 
 def get_calnet_users_for_uids(app, uids):
     return _get_calnet_users(app, 'uid', uids)
 
 
+@cachify(USER_FOR_UID_CACHE_KEY, timeout=USER_FOR_UID_CACHE_TIMEOUT)
+def _get_known_calnet_user_for_uid(app, uid):
+    # None, and thus negatively cached, if CalNet does not know the uid (e.g., a departed instructor).
+    return _search_calnet_users(app, 'uid', [uid]).get(uid)
+
+
+@cachify_many(USER_FOR_UID_CACHE_KEY, items_arg='uids', item_arg='uid', timeout=USER_FOR_UID_CACHE_TIMEOUT)
+def _get_known_calnet_users_for_uids(app, uids):
+    # Cached users are read in one multi-get. Misses are fetched from CalNet in one batched search.
+    return _search_calnet_users(app, 'uid', uids)
+
+
 def _get_calnet_users(app, id_type, ids):
+    users_by_id = _search_calnet_users(app, id_type, ids)
+    return dict((id_, users_by_id.get(id_) or _unknown_user_feed(id_type, id_)) for id_ in ids)
+
+
+def _search_calnet_users(app, id_type, ids):
+    # Users per id, for those ids that CalNet knows.
     users_by_id = {}
     if app.config['DIABLO_ENV'] == 'test':
         for id_ in ids:
@@ -52,16 +77,27 @@ def _get_calnet_users(app, id_type, ids):
         else:
             raise InternalServerError(f'get_calnet_users: {id_type} is an invalid id type')
 
+        # If more than one result has the same id then the first one wins.
+        calnet_results_per_id = {}
+        for calnet_result in calnet_results:
+            calnet_results_per_id.setdefault(calnet_result[id_type], calnet_result)
         for id_ in ids:
-            calnet_result = next((r for r in calnet_results if r[id_type] == id_), None)
-            feed = {
-                **_calnet_user_api_feed(calnet_result),
-                **{id_type: id_},
-            }
-            users_by_id[id_] = feed
+            calnet_result = calnet_results_per_id.get(id_)
+            if calnet_result:
+                users_by_id[id_] = {
+                    **_calnet_user_api_feed(calnet_result),
+                    **{id_type: id_},
+                }
     return users_by_id
 
 
+def _unknown_user_feed(id_type, id_):
+    return {
+        **_calnet_user_api_feed(None),
+        **{id_type: id_},
+    }
+
+
 def _calnet_user_api_feed(person):
     def _get(key):
         return _get_attribute(person, key)
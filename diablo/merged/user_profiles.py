@@ -0,0 +1,65 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+from diablo import db
+from diablo.merged.calnet import get_cached_calnet_users_for_uids
+from sqlalchemy import text
+
+
+def get_user_profiles_per_uid(app, uids):
+    # Profiles, shaped like CalNet user feeds, of instructors and admins as kept in local tables by the nightly sync
+    # (DblinkToRedshiftJob). Uids without a local name are looked up in CalNet.
+    uids = list(dict.fromkeys(uids))
+    # If uid is both an instructor and an admin then the instructors table wins.
+    sql = """
+        SELECT DISTINCT ON (uid) uid, dept_code, email, first_name, last_name
+        FROM (
+            SELECT uid, dept_code, email, first_name, last_name, 0 AS priority
+            FROM instructors
+            WHERE uid = ANY(:uids) AND (first_name IS NOT NULL OR last_name IS NOT NULL)
+            UNION ALL
+            SELECT uid, NULL AS dept_code, email, first_name, last_name, 1 AS priority
+            FROM admin_users
+            WHERE uid = ANY(:uids) AND (first_name IS NOT NULL OR last_name IS NOT NULL)
+        ) profiles
+        ORDER BY uid, priority
+    """
+    profiles_per_uid = {}
+    for row in db.session.execute(text(sql), {'uids': uids}):
+        uid = row['uid']
+        profiles_per_uid[uid] = {
+            'campusEmail': row['email'],
+            'deptCode': row['dept_code'],
+            'email': row['email'],
+            'firstName': row['first_name'],
+            'isExpiredPerLdap': None,
+            'lastName': row['last_name'],
+            'name': ' '.join(name for name in [row['first_name'], row['last_name']] if name) or uid,
+            'title': None,
+            'uid': uid,
+        }
+    unknown_uids = [uid for uid in uids if uid not in profiles_per_uid]
+    if unknown_uids:
+        profiles_per_uid.update(get_cached_calnet_users_for_uids(app=app, uids=unknown_uids))
+    return profiles_per_uid
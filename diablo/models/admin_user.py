@@ -22,9 +22,20 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 "AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
 ENHANCEMENTS, OR MODIFICATIONS.
 """
+import json
+import threading
+import time
+
 from diablo import db, std_commit
 from diablo.lib.util import utc_now
 from diablo.models.base import Base
+from diablo.models.term_version import TermVersion
+from flask import current_app as app
+from sqlalchemy import text
+
+# Per-process roster of admin users: deleted_at per uid, and when it was loaded.
+_roster = {}
+_roster_lock = threading.Lock()
 
 
 class AdminUser(Base):
@@ -32,6 +43,10 @@ class AdminUser(Base):
 
     id = db.Column(db.Integer, nullable=False, primary_key=True)  # noqa: A003
     uid = db.Column(db.String(255), nullable=False, unique=True)
+    # Profile, from CalNet, so that approvals by admins can be displayed without a directory lookup.
+    email = db.Column(db.String(255))
+    first_name = db.Column(db.String(255))
+    last_name = db.Column(db.String(255))
     deleted_at = db.Column(db.DateTime, nullable=True)
 
     def __init__(self, uid):
@@ -40,16 +55,32 @@ class AdminUser(Base):
     def __repr__(self):
         return f"""<AdminUser
                     uid={self.uid},
+                    email={self.email},
+                    first_name={self.first_name},
+                    last_name={self.last_name},
                     created_at={self.created_at},
                     updated_at={self.updated_at}>
                 """
 
+    @classmethod
+    def create(cls, uid):
+        user = cls(uid=uid)
+        db.session.add(user)
+        std_commit()
+        _reset_roster()
+        from diablo.models.user import User
+        User.invalidate_cached_profile(uid)
+        return user
+
     @classmethod
     def delete(cls, uid):
         now = utc_now()
         user = cls.query.filter_by(uid=uid).first()
         user.deleted_at = now
         std_commit()
+        _reset_roster()
+        from diablo.models.user import User
+        User.invalidate_cached_profile(uid)
         return user
 
     @classmethod
@@ -57,7 +88,41 @@ class AdminUser(Base):
         query = cls.query if include_deleted else cls.query.filter_by(deleted_at=None)
         return query.order_by(cls.uid).all()
 
+    @classmethod
+    def get_admin_uids(cls, include_deleted=False):
+        deleted_at_per_uid = _get_roster()
+        return set(uid for uid, deleted_at in deleted_at_per_uid.items() if include_deleted or deleted_at is None)
+
     @classmethod
     def is_admin(cls, uid, include_deleted=False):
-        query = cls.query.filter_by(uid=uid) if include_deleted else cls.query.filter_by(uid=uid, deleted_at=None)
-        return query.first() is not None
+        deleted_at_per_uid = _get_roster()
+        return uid in deleted_at_per_uid and (include_deleted or deleted_at_per_uid[uid] is None)
+
+    @classmethod
+    def update_profiles(cls, rows):
+        sql = """
+            UPDATE admin_users a
+            SET email = p.email, first_name = p.first_name, last_name = p.last_name, updated_at = now()
+            FROM json_populate_recordset(null::admin_users, :json_dumps) p
+            WHERE a.uid = p.uid
+        """
+        db.session.execute(text(sql), {'json_dumps': json.dumps(rows)})
+        std_commit()
+        # Names of approvers are part of course feeds, in all terms.
+        TermVersion.bump()
+
+
+def _get_roster():
+    # Changes made by other processes are picked up within ADMIN_USERS_CACHE_TIMEOUT seconds.
+    with _roster_lock:
+        loaded_at = _roster.get('loaded_at')
+        if loaded_at is None or time.monotonic() - loaded_at > app.config['ADMIN_USERS_CACHE_TIMEOUT']:
+            rows = db.session.execute(text('SELECT uid, deleted_at FROM admin_users'))
+            _roster['deleted_at_per_uid'] = dict((row['uid'], row['deleted_at']) for row in rows)
+            _roster['loaded_at'] = time.monotonic()
+        return _roster['deleted_at_per_uid']
+
+
+def _reset_roster():
+    with _roster_lock:
+        _roster.clear()
@@ -26,7 +26,8 @@ from datetime import datetime
 
 from diablo import db, std_commit
 from diablo.lib.util import to_isoformat
-from diablo.merged.calnet import get_calnet_user_for_uid
+from diablo.merged.user_profiles import get_user_profiles_per_uid
+from diablo.models.course_status import CourseStatus
 from diablo.models.room import Room
 from flask import current_app as app
 from sqlalchemy import and_
@@ -137,6 +138,7 @@ class Approval(db.Model):
         )
         db.session.add(approval)
         std_commit()
+        CourseStatus.refresh(term_id=term_id, section_ids=[section_id])
         return approval
 
     @classmethod
@@ -152,9 +154,16 @@ class Approval(db.Model):
     def get_approvals_per_term(cls, term_id):
         return cls.query.filter_by(term_id=int(term_id)).order_by(cls.section_id, cls.created_at).all()
 
-    def to_api_json(self):
+    def to_api_json(self, rooms_by_id=None, profiles_per_uid=None):
+        if profiles_per_uid is None:
+            profiles_per_uid = get_user_profiles_per_uid(app=app, uids=[self.approved_by_uid])
+        approved_by = profiles_per_uid[self.approved_by_uid]
+        if rooms_by_id:
+            room_feed = rooms_by_id.get(self.room_id, None)
+        else:
+            room_feed = Room.get_room(self.room_id).to_api_json() if self.room_id else None
         return {
-            'approvedBy': get_calnet_user_for_uid(app, self.approved_by_uid),
+            'approvedBy': approved_by,
             'wasApprovedByAdmin': self.approver_type == 'admin',
             'createdAt': to_isoformat(self.created_at),
             'crossListedSectionIds': self.cross_listed_section_ids,
@@ -162,7 +171,7 @@ class Approval(db.Model):
             'publishTypeName': NAMES_PER_PUBLISH_TYPE[self.publish_type],
             'recordingType': self.recording_type,
             'recordingTypeName': NAMES_PER_RECORDING_TYPE[self.recording_type],
-            'room': Room.get_room(self.room_id).to_api_json() if self.room_id else None,
+            'room': room_feed,
             'sectionId': self.section_id,
             'termId': self.term_id,
         }
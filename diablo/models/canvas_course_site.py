@@ -27,6 +27,8 @@ from datetime import datetime
 
 from diablo import db, std_commit
 from diablo.lib.util import to_isoformat
+from diablo.models.term_version import TermVersion
+from sqlalchemy import and_
 
 
 class CanvasCourseSite(db.Model):
@@ -57,6 +59,11 @@ class CanvasCourseSite(db.Model):
     def get_canvas_course_sites(cls, term_id, section_id):
         return cls.query.filter_by(term_id=term_id, section_id=section_id).all()
 
+    @classmethod
+    def get_canvas_course_sites_per_section_ids(cls, term_id, section_ids):
+        criteria = and_(cls.section_id.in_(section_ids), cls.term_id == term_id)
+        return cls.query.filter(criteria).all()
+
     @classmethod
     def refresh_term_data(cls, term_id, canvas_course_sites):
         for canvas_course_site in cls.query.filter_by(term_id=term_id).all():
@@ -73,6 +80,7 @@ class CanvasCourseSite(db.Model):
                     ),
                 )
         std_commit()
+        TermVersion.bump(term_id=term_id)
 
     def to_api_json(self):
         return {
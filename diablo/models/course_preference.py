@@ -26,6 +26,7 @@ from datetime import datetime
 
 from diablo import db, std_commit
 from diablo.lib.util import to_isoformat
+from diablo.models.course_status import CourseStatus
 from diablo.models.cross_listing import CrossListing
 from sqlalchemy import and_
 
@@ -58,6 +59,7 @@ class CoursePreference(db.Model):
     @classmethod
     def update_opt_out(cls, term_id, section_id, opt_out):
         section_ids = CrossListing.get_cross_listed_sections(section_id=section_id, term_id=term_id) + [section_id]
+        affected_section_ids = list(section_ids)
         criteria = and_(cls.section_id.in_(section_ids), cls.term_id == term_id)
         for row in cls.query.filter(criteria).all():
             row.has_opted_out = opt_out
@@ -70,6 +72,7 @@ class CoursePreference(db.Model):
             )
             db.session.add(preferences)
         std_commit()
+        CourseStatus.refresh(term_id=term_id, section_ids=affected_section_ids)
         return cls.query.filter_by(term_id=term_id, section_id=section_id).first()
 
     def to_api_json(self):
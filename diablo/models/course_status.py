@@ -0,0 +1,210 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+from collections import OrderedDict
+import threading
+
+from diablo import db, std_commit
+from diablo.models.term_version import TermVersion
+from sqlalchemy import text
+
+# Per-process cache of CourseStatusIndex, keyed by term_id. Only the most recently used terms are kept.
+_MAX_INDEXED_TERMS = 3
+_indexes_per_term = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+class CourseStatus(db.Model):
+    __tablename__ = 'course_status'
+
+    term_id = db.Column(db.Integer, nullable=False, primary_key=True)
+    section_id = db.Column(db.Integer, nullable=False, primary_key=True)
+    has_approvals = db.Column(db.Boolean, nullable=False)
+    has_opted_out = db.Column(db.Boolean, nullable=False)
+    is_invited = db.Column(db.Boolean, nullable=False)
+    is_scheduled = db.Column(db.Boolean, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"""<CourseStatus
+                    term_id={self.term_id},
+                    section_id={self.section_id},
+                    has_approvals={self.has_approvals},
+                    has_opted_out={self.has_opted_out},
+                    is_invited={self.is_invited},
+                    is_scheduled={self.is_scheduled},
+                    updated_at={self.updated_at}>
+                """
+
+    @classmethod
+    def refresh(cls, term_id, section_ids=None):
+        # Recompute status flags from approvals, course_preferences, scheduled and sent_emails. With no section_ids,
+        # rebuild the entire term.
+        term_id = int(term_id)
+        section_ids = section_ids and [int(section_id) for section_id in section_ids]
+        section_criteria = 'AND section_id = ANY(:section_ids)' if section_ids else ''
+        params = {
+            'section_ids': section_ids,
+            'term_id': term_id,
+        }
+        db.session.execute(text(f'DELETE FROM course_status WHERE term_id = :term_id {section_criteria}'), params)
+        sql = f"""
+            INSERT INTO course_status (
+                term_id, section_id, has_approvals, has_opted_out, is_invited, is_scheduled, updated_at
+            )
+            SELECT
+                s.term_id,
+                s.section_id,
+                EXISTS (
+                    SELECT FROM approvals
+                    WHERE section_id = s.section_id AND term_id = s.term_id
+                ),
+                EXISTS (
+                    SELECT FROM course_preferences
+                    WHERE section_id = s.section_id AND term_id = s.term_id AND has_opted_out IS TRUE
+                ),
+                EXISTS (
+                    SELECT FROM sent_emails
+                    WHERE section_id = s.section_id AND term_id = s.term_id AND template_type = 'invitation'
+                ),
+                EXISTS (
+                    SELECT FROM scheduled
+                    WHERE section_id = s.section_id AND term_id = s.term_id
+                ),
+                now()
+            FROM (
+                SELECT DISTINCT term_id, section_id
+                FROM sis_sections
+                WHERE term_id = :term_id {section_criteria}
+            ) s
+            ON CONFLICT (term_id, section_id) DO UPDATE SET
+                has_approvals = EXCLUDED.has_approvals,
+                has_opted_out = EXCLUDED.has_opted_out,
+                is_invited = EXCLUDED.is_invited,
+                is_scheduled = EXCLUDED.is_scheduled,
+                updated_at = EXCLUDED.updated_at
+        """
+        db.session.execute(text(sql), params)
+        std_commit()
+        TermVersion.bump(term_id=term_id, section_ids=section_ids)
+
+    @classmethod
+    def get_index(cls, term_id):
+        term_id = int(term_id)
+        version = TermVersion.get_version(term_id)
+        with _indexes_lock:
+            index = _indexes_per_term.get(term_id)
+            if index and index.version == version:
+                _indexes_per_term.move_to_end(term_id)
+                return index
+        # Build outside the lock, so that requests for other terms are not held up.
+        index = CourseStatusIndex.build(term_id=term_id, version=version)
+        with _indexes_lock:
+            _indexes_per_term[term_id] = index
+            _indexes_per_term.move_to_end(term_id)
+            while len(_indexes_per_term) > _MAX_INDEXED_TERMS:
+                _indexes_per_term.popitem(last=False)
+        return index
+
+
+class CourseStatusIndex:
+    """Section-id bitsets of a term. The sorted section ids of the term map to bit positions."""
+
+    flags = ['awaiting_approval', 'has_approvals', 'has_opted_out', 'in_feed', 'is_eligible', 'is_invited', 'is_scheduled']
+
+    def __init__(self, term_id, version, rows):
+        self.term_id = term_id
+        self.version = version
+        self.section_ids = []
+        self.bitsets = dict((flag, 0) for flag in self.flags)
+        for position, row in enumerate(rows):
+            self.section_ids.append(row['section_id'])
+            for flag in self.flags:
+                if row[flag]:
+                    self.bitsets[flag] |= 1 << position
+
+    @classmethod
+    def build(cls, term_id, version):
+        # Flags other than those of course_status mirror the joins and conditions of the SisSection filter queries.
+        sql = """
+            SELECT
+                cs.section_id,
+                cs.has_approvals,
+                cs.has_opted_out,
+                cs.is_invited,
+                cs.is_scheduled,
+                COALESCE(f.awaiting_approval, FALSE) AS awaiting_approval,
+                COALESCE(f.in_feed, FALSE) AS in_feed,
+                COALESCE(f.is_eligible, FALSE) AS is_eligible
+            FROM course_status cs
+            LEFT JOIN (
+                SELECT
+                    s.section_id,
+                    bool_or(
+                        r.capability IS NOT NULL
+                        AND NOT EXISTS (
+                            SELECT FROM approvals
+                            WHERE section_id = s.section_id AND term_id = s.term_id AND approved_by_uid = i.uid
+                        )
+                    ) AS awaiting_approval,
+                    bool_or(s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')) AS in_feed,
+                    bool_or(s.instructor_role_code IN ('ICNT', 'PI', 'TNIC') AND r.capability IS NOT NULL) AS is_eligible
+                FROM sis_sections s
+                JOIN instructors i ON i.uid = s.instructor_uid
+                JOIN rooms r ON r.location = s.meeting_location
+                WHERE s.term_id = :term_id
+                GROUP BY s.section_id
+            ) f ON f.section_id = cs.section_id
+            WHERE cs.term_id = :term_id
+            ORDER BY cs.section_id
+        """
+        return cls(term_id=term_id, version=version, rows=db.session.execute(text(sql), {'term_id': term_id}))
+
+    def count(self, filter_):
+        return bin(self.get_bitset(filter_)).count('1')
+
+    def get_bitset(self, filter_):
+        is_eligible = self.bitsets['is_eligible']
+        has_approvals = self.bitsets['has_approvals']
+        has_opted_out = self.bitsets['has_opted_out']
+        is_invited = self.bitsets['is_invited']
+        is_scheduled = self.bitsets['is_scheduled']
+        if filter_ == 'Do Not Email':
+            return is_eligible & has_opted_out & ~is_scheduled
+        elif filter_ == 'Invited':
+            return is_eligible & is_invited & ~(has_approvals | is_scheduled | has_opted_out)
+        elif filter_ == 'Not Invited':
+            return is_eligible & ~(is_invited | has_approvals | is_scheduled | has_opted_out)
+        elif filter_ == 'Partially Approved':
+            return self.bitsets['awaiting_approval'] & has_approvals & is_invited
+        elif filter_ == 'Scheduled':
+            return self.bitsets['in_feed'] & is_scheduled
+        else:
+            raise ValueError(f'Invalid filter: {filter_}')
+
+    def get_section_ids(self, filter_):
+        # Bit n of the binary string, read from the right, is the section at position n.
+        bits = reversed(bin(self.get_bitset(filter_))[2:])
+        return [section_id for section_id, bit in zip(self.section_ids, bits) if bit == '1']
@@ -27,7 +27,8 @@ from itertools import islice
 
 from diablo import db, std_commit
 from diablo.lib.util import to_isoformat
-from sqlalchemy import text
+from diablo.models.term_version import TermVersion
+from sqlalchemy import and_, text
 from sqlalchemy.dialects.postgresql import ARRAY
 
 
@@ -78,6 +79,11 @@ class CrossListing(db.Model):
         row = cls.query.filter_by(section_id=section_id, term_id=term_id).first()
         return row.cross_listed_section_ids if row else []
 
+    @classmethod
+    def get_cross_listings_per_section_ids(cls, section_ids, term_id):
+        criteria = and_(cls.section_id.in_(section_ids), cls.term_id == term_id)
+        return cls.query.filter(criteria).all()
+
     @classmethod
     def refresh(cls, term_id):
         # First group section IDs by schedule (time and location)
@@ -139,6 +145,7 @@ class CrossListing(db.Model):
                     query += ','
             db.session.execute(query, {'term_id': term_id})
             std_commit()
+        TermVersion.bump(term_id=term_id)
 
     def to_api_json(self):
         return {
@@ -150,8 +150,7 @@ def _create_emails_sent():
 
 def _create_users():
     for test_user in _test_users:
-        user = AdminUser(uid=test_user['uid'])
-        db.session.add(user)
+        user = AdminUser.create(uid=test_user['uid'])
         if test_user['deleted_at']:
             AdminUser.delete(user.uid)
     std_commit(allow_test_environment=True)
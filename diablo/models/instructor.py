@@ -27,6 +27,8 @@ import json
 from diablo import db
 from diablo.lib.util import utc_now
 from diablo.models.base import Base
+from diablo.models.term_version import TermVersion
+from sqlalchemy import text
 
 
 class Instructor(Base):
@@ -63,6 +65,24 @@ class Instructor(Base):
                     updated_at={self.updated_at}>
                 """
 
+    @classmethod
+    def get_uids_to_sync(cls, max_age_days):
+        # Instructors of SIS sections who are new to the instructors table, and those not updated in 'max_age_days'.
+        sql = """
+            SELECT DISTINCT s.instructor_uid, i.uid IS NULL AS is_new
+            FROM sis_sections s
+            LEFT JOIN instructors i ON i.uid = s.instructor_uid
+            WHERE
+                s.instructor_uid IS NOT NULL
+                AND (i.uid IS NULL OR i.updated_at < now() - :max_age_days * INTERVAL '1 day')
+            ORDER BY s.instructor_uid
+        """
+        new_uids = []
+        stale_uids = []
+        for row in db.session.execute(text(sql), {'max_age_days': max_age_days}):
+            (new_uids if row['is_new'] else stale_uids).append(row['instructor_uid'])
+        return new_uids, stale_uids
+
     @classmethod
     def upsert(cls, rows):
         now = utc_now().strftime('%Y-%m-%dT%H:%M:%S+00')
@@ -81,7 +101,8 @@ class Instructor(Base):
                     dept_code = EXCLUDED.dept_code,
                     email = EXCLUDED.email,
                     first_name = EXCLUDED.first_name,
-                    last_name = EXCLUDED.last_name;
+                    last_name = EXCLUDED.last_name,
+                    updated_at = EXCLUDED.updated_at;
             """
             data = [
                 {
@@ -95,3 +116,5 @@ class Instructor(Base):
                 } for row in rows_subset
             ]
             db.session.execute(query, {'json_dumps': json.dumps(data)})
+        # Instructor names and emails are part of course feeds, in all terms.
+        TermVersion.bump()
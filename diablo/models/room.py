@@ -27,6 +27,7 @@ from datetime import datetime
 
 from diablo import db, std_commit
 from diablo.lib.util import to_isoformat
+from diablo.models.term_version import TermVersion
 from sqlalchemy import func, text
 from sqlalchemy.dialects.postgresql import ENUM
 
@@ -81,6 +82,7 @@ class Room(db.Model):
         )
         db.session.add(room)
         std_commit()
+        TermVersion.bump()
         return room
 
     @classmethod
@@ -136,6 +138,7 @@ class Room(db.Model):
         room.capability = capability
         db.session.add(room)
         std_commit()
+        TermVersion.bump()
         return room
 
     @classmethod
@@ -149,6 +152,7 @@ class Room(db.Model):
             room.kaltura_resource_id = kaltura_resource_id
             db.session.add(room)
         std_commit()
+        TermVersion.bump()
 
     @classmethod
     def set_auditorium(cls, room_id, is_auditorium):
@@ -156,6 +160,7 @@ class Room(db.Model):
         room.is_auditorium = is_auditorium
         db.session.add(room)
         std_commit()
+        TermVersion.bump()
         return room
 
     @classmethod
@@ -27,6 +27,7 @@ from datetime import datetime
 from diablo import db, std_commit
 from diablo.lib.util import format_days, format_time, to_isoformat
 from diablo.models.approval import NAMES_PER_PUBLISH_TYPE, NAMES_PER_RECORDING_TYPE, publish_type, recording_type
+from diablo.models.course_status import CourseStatus
 from diablo.models.room import Room
 from sqlalchemy import and_
 from sqlalchemy.dialects.postgresql import ARRAY
@@ -114,6 +115,7 @@ class Scheduled(db.Model):
         )
         db.session.add(scheduled)
         std_commit()
+        CourseStatus.refresh(term_id=term_id, section_ids=[section_id])
         return scheduled
 
     @classmethod
@@ -129,7 +131,11 @@ class Scheduled(db.Model):
     def get_scheduled(cls, section_id, term_id):
         return cls.query.filter_by(section_id=section_id, term_id=term_id).first()
 
-    def to_api_json(self):
+    def to_api_json(self, rooms_by_id=None):
+        if rooms_by_id:
+            room_feed = rooms_by_id.get(self.room_id, None)
+        else:
+            room_feed = Room.get_room(self.room_id).to_api_json() if self.room_id else None
         return {
             'createdAt': to_isoformat(self.created_at),
             'crossListedSectionIds': self.cross_listed_section_ids,
@@ -141,7 +147,7 @@ class Scheduled(db.Model):
             'publishTypeName': NAMES_PER_PUBLISH_TYPE[self.publish_type],
             'recordingType': self.recording_type,
             'recordingTypeName': NAMES_PER_RECORDING_TYPE[self.recording_type],
-            'room': Room.get_room(self.room_id).to_api_json() if self.room_id else None,
+            'room': room_feed,
             'sectionId': self.section_id,
             'termId': self.term_id,
         }
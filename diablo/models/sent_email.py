@@ -27,7 +27,9 @@ from datetime import datetime
 
 from diablo import db, std_commit
 from diablo.lib.util import to_isoformat
+from diablo.models.course_status import CourseStatus
 from diablo.models.email_template import email_template_type, EmailTemplate
+from sqlalchemy import and_
 from sqlalchemy.dialects.postgresql import ARRAY
 
 
@@ -67,6 +69,8 @@ class SentEmail(db.Model):
         )
         db.session.add(sent_email)
         std_commit()
+        if section_id and template_type == 'invitation':
+            CourseStatus.refresh(term_id=term_id, section_ids=[section_id])
         return sent_email
 
     @classmethod
@@ -81,6 +85,12 @@ class SentEmail(db.Model):
             term_id=term_id,
         ).order_by(cls.sent_at).all()
 
+    @classmethod
+    def get_emails_of_type_per_section_ids(cls, section_ids, template_type, term_id):
+        criteria = and_(cls.section_id.in_(section_ids), cls.template_type == template_type, cls.term_id == term_id)
+        # Ties on sent_at are broken by id, as in the JSON aggregation of course feeds.
+        return cls.query.filter(criteria).order_by(cls.sent_at, cls.id).all()
+
     def to_api_json(self):
         return {
             'id': self.id,
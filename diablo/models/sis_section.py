@@ -24,19 +24,74 @@ ENHANCEMENTS, OR MODIFICATIONS.
 """
 
 from datetime import datetime
+import hashlib
 import json
 
-from diablo import db
-from diablo.lib.util import format_days, format_time, utc_now
-from diablo.models.approval import Approval
+from decorator import decorator
+from diablo import cache, db
+from diablo.lib.util import encode_cursor, format_days, format_time, get_args_dict, objects_to_dict_organized_by_section_id, utc_now
+from diablo.merged.user_profiles import get_user_profiles_per_uid
+from diablo.models.approval import Approval, NAMES_PER_PUBLISH_TYPE, NAMES_PER_RECORDING_TYPE
 from diablo.models.canvas_course_site import CanvasCourseSite
 from diablo.models.course_preference import CoursePreference
+from diablo.models.course_status import CourseStatus
 from diablo.models.cross_listing import CrossListing
 from diablo.models.room import Room
 from diablo.models.scheduled import Scheduled
 from diablo.models.sent_email import SentEmail
+from diablo.models.term_version import TermVersion
+from flask import current_app as app
 from sqlalchemy import text
 
+# Columns of the course-feed queries below. Each row represents one instructor of one section.
+_COURSE_FEED_COLUMNS = """
+    s.allowed_units,
+    s.course_name,
+    s.course_title,
+    s.instruction_format,
+    s.instructor_role_code,
+    s.is_primary,
+    s.meeting_days,
+    s.meeting_end_date,
+    s.meeting_end_time,
+    s.meeting_location,
+    s.meeting_start_date,
+    s.meeting_start_time,
+    s.section_id,
+    s.section_num,
+    s.term_id,
+    i.dept_code AS instructor_dept_code,
+    i.email AS instructor_email,
+    i.first_name || ' ' || i.last_name AS instructor_name,
+    i.uid AS instructor_uid,
+    r.id AS room_id,
+    r.location AS room_location
+"""
+
+
+def cache_per_term_version():
+    # Feeds are cached under the current version of the term. Writes that alter feed content bump the version and, in
+    # effect, invalidate all cached feeds of the term. See TermVersion.
+    @decorator
+    def _cache_per_term_version(func, *args, **kw):
+        args_dict = get_args_dict(func, *args, **kw)
+        if args_dict.get('stream'):
+            # Generators are not cached.
+            return func(*args, **kw)
+        args_dict.pop('cls', None)
+        term_id = args_dict['term_id']
+        version = TermVersion.get_version(term_id)
+        args_digest = hashlib.md5(json.dumps(args_dict, default=str, sort_keys=True).encode()).hexdigest()
+        assembly = 'json_aggregation' if app.config['COURSE_FEED_JSON_AGGREGATION'] else 'python'
+        key = f'course_feed/term_{term_id}/version_{version}/{assembly}/{func.__name__}/{args_digest}'
+        cached = cache.get(key)
+        if cached is None:
+            cached = func(*args, **kw)
+            cache.set(key, cached, app.config['COURSE_FEED_CACHE_TIMEOUT'])
+        return cached
+
+    return _cache_per_term_version
+
 
 class SisSection(db.Model):
     __tablename__ = 'sis_sections'
@@ -166,121 +221,119 @@ class SisSection(db.Model):
         )
         return [row['instructor_uid'] for row in rows]
 
+    @classmethod
+    def get_instructor_uids_of_sections(cls, term_id, section_ids):
+        # Instructors of the given sections and of sections cross-listed with them, in either direction.
+        sql = """
+            SELECT DISTINCT instructor_uid
+            FROM sis_sections
+            WHERE
+                term_id = :term_id
+                AND instructor_uid IS NOT NULL
+                AND (
+                    section_id = ANY(:section_ids)
+                    OR section_id IN (
+                        SELECT unnest(cross_listed_section_ids)
+                        FROM cross_listings
+                        WHERE term_id = :term_id AND section_id = ANY(:section_ids)
+                    )
+                    OR section_id IN (
+                        SELECT section_id
+                        FROM cross_listings
+                        WHERE term_id = :term_id AND cross_listed_section_ids && :section_ids
+                    )
+                )
+        """
+        rows = db.session.execute(
+            text(sql),
+            {
+                'section_ids': [int(section_id) for section_id in section_ids],
+                'term_id': term_id,
+            },
+        )
+        return [row['instructor_uid'] for row in rows]
+
     @classmethod
     def get_courses_per_location(cls, term_id, location):
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
             WHERE
                 s.term_id = :term_id
                 AND s.meeting_location = :location
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        return _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
                 'location': location,
                 'term_id': term_id,
             },
+            include_rooms=False,
         )
-        return _to_api_json(term_id=term_id, rows=rows, include_rooms=False)
 
     @classmethod
-    def get_courses_invited(cls, term_id):
+    @cache_per_term_version()
+    def get_courses_invited(cls, term_id, page=None, stream=False):
+        section_ids = CourseStatus.get_index(term_id).get_section_ids('Invited')
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
-            JOIN sent_emails e ON e.section_id = s.section_id
             WHERE
                 s.term_id = :term_id
                 AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
-                AND e.template_type = 'invitation'
                 AND r.capability IS NOT NULL
-                AND NOT EXISTS (
-                    SELECT FROM approvals
-                    WHERE section_id = s.section_id AND term_id = s.term_id
-                )
-                AND NOT EXISTS (
-                    SELECT FROM scheduled
-                    WHERE section_id = s.section_id AND term_id = s.term_id
-                )
-                AND NOT EXISTS (
-                    SELECT FROM course_preferences
-                    WHERE section_id = s.section_id AND term_id = s.term_id AND has_opted_out IS TRUE
-                )
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
+                AND s.section_id = ANY(:section_ids)
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        return _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
+                'section_ids': section_ids,
                 'term_id': term_id,
             },
+            page=page,
+            stream=stream,
+            total_count=len(section_ids),
         )
-        return _to_api_json(term_id=term_id, rows=rows)
 
     @classmethod
-    def get_courses_opted_out(cls, term_id):
+    @cache_per_term_version()
+    def get_courses_opted_out(cls, term_id, page=None, stream=False):
+        section_ids = CourseStatus.get_index(term_id).get_section_ids('Do Not Email')
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
-            JOIN course_preferences c ON c.section_id = s.section_id AND c.term_id = :term_id
             WHERE
                 s.term_id = :term_id
-                AND c.has_opted_out IS TRUE
                 AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
                 AND r.capability IS NOT NULL
-                AND NOT EXISTS (
-                    SELECT FROM scheduled
-                    WHERE section_id = s.section_id AND term_id = s.term_id
-                )
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
+                AND s.section_id = ANY(:section_ids)
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        return _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
+                'section_ids': section_ids,
                 'term_id': term_id,
             },
+            page=page,
+            stream=stream,
+            total_count=len(section_ids),
         )
-        return _to_api_json(term_id=term_id, rows=rows)
 
     @classmethod
-    def get_eligible_courses_not_invited(cls, term_id):
+    @cache_per_term_version()
+    def get_eligible_courses_not_invited(cls, term_id, page=None, stream=False):
+        section_ids = CourseStatus.get_index(term_id).get_section_ids('Not Invited')
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
@@ -288,43 +341,25 @@ class SisSection(db.Model):
                 s.term_id = :term_id
                 AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
                 AND r.capability IS NOT NULL
-                AND NOT EXISTS (
-                    SELECT FROM sent_emails
-                    WHERE template_type = 'invitation' AND section_id = s.section_id
-                )
-                AND NOT EXISTS (
-                    SELECT FROM approvals
-                    WHERE section_id = s.section_id AND term_id = s.term_id
-                )
-                AND NOT EXISTS (
-                    SELECT FROM scheduled
-                    WHERE section_id = s.section_id AND term_id = s.term_id
-                )
-                AND NOT EXISTS (
-                    SELECT FROM course_preferences
-                    WHERE section_id = s.section_id AND term_id = s.term_id AND has_opted_out IS TRUE
-                )
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
+                AND s.section_id = ANY(:section_ids)
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        return _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
+                'section_ids': section_ids,
                 'term_id': term_id,
             },
+            page=page,
+            stream=stream,
+            total_count=len(section_ids),
         )
-        return _to_api_json(term_id=term_id, rows=rows)
 
     @classmethod
+    @cache_per_term_version()
     def get_course(cls, term_id, section_id):
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
@@ -332,63 +367,44 @@ class SisSection(db.Model):
                 s.term_id = :term_id
                 AND s.section_id = :section_id
                 AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        api_json = _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
                 'section_id': section_id,
                 'term_id': term_id,
             },
         )
-        api_json = _to_api_json(term_id=term_id, rows=rows)
         return api_json[0] if api_json else None
 
     @classmethod
-    def get_course_changes(cls, term_id):
+    @cache_per_term_version()
+    def get_course_changes(cls, term_id, page=None):
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
             JOIN scheduled d ON d.section_id = s.section_id AND d.term_id = :term_id
             WHERE
                 s.term_id = :term_id
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
         """
-        rows = db.session.execute(
-            text(sql),
-            {
-                'term_id': term_id,
-            },
-        )
         courses = []
-        for course in _to_api_json(term_id=term_id, rows=rows):
+        for course in _get_course_feed(term_id=term_id, sql=sql, params={'term_id': term_id}):
             scheduled = course['scheduled']
             if scheduled['hasObsoleteRoom'] \
                     or scheduled['hasObsoleteInstructors'] \
                     or scheduled['hasObsoleteMeetingTimes']:
                 courses.append(course)
-        return courses
+        # Obsolete flags are derived in Python so this feed is paginated after the fact.
+        return _paginate_courses(courses, page) if page else courses
 
     @classmethod
+    @cache_per_term_version()
     def get_courses(cls, term_id, section_ids):
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
@@ -396,113 +412,120 @@ class SisSection(db.Model):
                 s.term_id = :term_id
                 AND s.section_id = ANY(:section_ids)
                 AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        return _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
                 'section_ids': section_ids,
                 'term_id': term_id,
             },
         )
-        return _to_api_json(term_id=term_id, rows=rows)
 
     @classmethod
-    def get_courses_partially_approved(cls, term_id):
+    @cache_per_term_version()
+    def get_courses_partially_approved(cls, term_id, page=None, stream=False):
+        section_ids = CourseStatus.get_index(term_id).get_section_ids('Partially Approved')
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
-            JOIN approvals a ON a.section_id = s.section_id AND a.term_id = :term_id
             JOIN instructors i ON i.uid = s.instructor_uid
-            JOIN sent_emails e ON e.section_id = s.section_id
             JOIN rooms r ON r.location = s.meeting_location
             WHERE
                 s.term_id = :term_id
-                AND e.template_type = 'invitation'
+                AND s.section_id = ANY(:section_ids)
                 AND r.capability IS NOT NULL
                 AND i.uid NOT IN (
                     SELECT approved_by_uid
                     FROM approvals
                     WHERE section_id = s.section_id AND term_id = :term_id
                 )
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        return _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
+                'section_ids': section_ids,
                 'term_id': term_id,
             },
+            page=page,
+            stream=stream,
+            total_count=len(section_ids),
         )
-        return _to_api_json(term_id=term_id, rows=rows)
 
     @classmethod
+    @cache_per_term_version()
     def get_courses_per_instructor_uid(cls, term_id, instructor_uid):
+        # One pass: the feed includes all instructors of sections taught by the given instructor.
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
             WHERE
                 s.term_id = :term_id
-                AND s.instructor_uid = :instructor_uid
                 AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
+                AND s.section_id IN (
+                    SELECT t.section_id
+                    FROM sis_sections t
+                    JOIN instructors ti ON ti.uid = t.instructor_uid
+                    WHERE
+                        t.term_id = :term_id
+                        AND t.instructor_uid = :instructor_uid
+                        AND t.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
+                )
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        return _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
                 'instructor_uid': instructor_uid,
                 'term_id': term_id,
             },
         )
-        section_ids = []
-        for row in rows:
-            section_ids.append(row['section_id'])
-        return cls.get_courses(term_id=term_id, section_ids=section_ids)
 
     @classmethod
-    def get_courses_scheduled(cls, term_id):
+    @cache_per_term_version()
+    def get_courses_scheduled(cls, term_id, page=None, stream=False):
+        section_ids = CourseStatus.get_index(term_id).get_section_ids('Scheduled')
         sql = f"""
-            SELECT
-                s.*,
-                i.dept_code AS instructor_dept_code,
-                i.email AS instructor_email,
-                i.first_name || ' ' || i.last_name AS instructor_name,
-                i.uid AS instructor_uid,
-                r.id AS room_id,
-                r.location AS room_location
+            SELECT {_COURSE_FEED_COLUMNS}
             FROM sis_sections s
             JOIN instructors i ON i.uid = s.instructor_uid
             JOIN rooms r ON r.location = s.meeting_location
-            JOIN scheduled d ON d.section_id = s.section_id AND d.term_id = :term_id
             WHERE
                 s.term_id = :term_id
-            ORDER BY s.course_title, s.section_id, s.instructor_uid
+                AND s.section_id = ANY(:section_ids)
+                AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
         """
-        rows = db.session.execute(
-            text(sql),
-            {
+        return _get_course_feed(
+            term_id=term_id,
+            sql=sql,
+            params={
+                'section_ids': section_ids,
                 'term_id': term_id,
             },
+            page=page,
+            stream=stream,
+            total_count=len(section_ids),
         )
-        section_ids = []
-        for row in rows:
-            section_ids.append(row['section_id'])
-        return cls.get_courses(term_id, section_ids)
+
+    @classmethod
+    def is_teaching(cls, term_id, instructor_uid):
+        # True if get_courses_per_instructor_uid would return one or more courses.
+        sql = """
+            SELECT EXISTS (
+                SELECT 1
+                FROM sis_sections s
+                JOIN instructors i ON i.uid = s.instructor_uid
+                JOIN rooms r ON r.location = s.meeting_location
+                WHERE
+                    s.term_id = :term_id
+                    AND s.instructor_uid = :instructor_uid
+                    AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
+            )
+        """
+        return db.session.execute(text(sql), {'instructor_uid': instructor_uid, 'term_id': term_id}).scalar()
 
     @classmethod
     def refresh(cls, sis_sections, term_id):
@@ -546,137 +569,561 @@ class SisSection(db.Model):
                 } for row in rows_subset
             ]
             db.session.execute(query, {'json_dumps': json.dumps(data)})
+        # Course filters read course_status, which must cover new and changed sections. Its refresh bumps the term
+        # version.
+        CourseStatus.refresh(term_id=term_id)
 
 
-def _to_api_json(term_id, rows, include_rooms=True):
-    courses_per_id = {}
-    instructors_per_section_id = {}
-    section_ids_opted_out = CoursePreference.get_section_ids_opted_out(term_id=term_id)
-    # If course has multiple instructors then the section_id will be represented across multiple rows.
-    for row in rows:
-        approvals = []
-        section_id = int(row['section_id'])
-        if section_id not in courses_per_id:
-            # Construct new course
-            instructors_per_section_id[section_id] = []
-            has_opted_out = section_id in section_ids_opted_out
-            cross_listings = _get_cross_listed_courses(section_id=section_id, term_id=term_id)
-            approvals, scheduled = _get_approvals_and_scheduled(
-                section_ids=[section_id] + [c['sectionId'] for c in cross_listings],
-                term_id=term_id,
-            )
-            course_name = row['course_name']
-            instruction_format = row['instruction_format']
-            section_num = row['section_num']
-            course = {
-                'allowedUnits': row['allowed_units'],
-                'canvasCourseSites': _canvas_course_sites(term_id, section_id),
-                'courseName': course_name,
-                'courseTitle': row['course_title'],
-                'crossListings': cross_listings,
-                'hasOptedOut': has_opted_out,
-                'instructionFormat': instruction_format,
-                'instructors': [], 'isPrimary': row['is_primary'],
-                'label': f'{course_name}, {instruction_format} {section_num}',
-                'meetingDays': format_days(row['meeting_days']),
-                'meetingEndDate': row['meeting_end_date'],
-                'meetingEndTime': format_time(row['meeting_end_time']),
-                'meetingLocation': row['meeting_location'],
-                'meetingStartDate': row['meeting_start_date'],
-                'meetingStartTime': format_time(row['meeting_start_time']),
-                'sectionId': section_id,
-                'sectionNum': section_num,
-                'termId': row['term_id'],
-                'approvals': approvals,
-                'scheduled': scheduled,
-            }
-            invites = SentEmail.get_emails_of_type(
-                section_id=section_id,
-                template_type='invitation',
-                term_id=term_id,
-            )
-            course['invitees'] = []
-            for invite in invites:
-                course['invitees'].extend(invite.recipient_uids)
-
-            if scheduled:
-                course['status'] = 'Scheduled'
-            elif approvals:
-                course['status'] = 'Partially Approved'
-            else:
-                course['status'] = 'Invited' if invites else 'Not Invited'
-
-            if include_rooms:
-                room = Room.get_room(row['room_id']).to_api_json() if 'room_id' in row else None
-                course['room'] = room
-            courses_per_id[section_id] = course
-
-        # Build upon course object with one instructor per row.
-        instructor_uid = row['instructor_uid']
-        if instructor_uid not in [i['uid'] for i in instructors_per_section_id[section_id]]:
-            instructors_per_section_id[section_id].append({
-                'approval': next((a for a in approvals if a['approvedBy']['uid'] == instructor_uid), False),
-                'deptCode': row['instructor_dept_code'],
-                'email': row['instructor_email'],
-                'name': row['instructor_name'],
-                'roleCode': row['instructor_role_code'],
-                'uid': instructor_uid,
-                'wasSentInvite': instructor_uid in courses_per_id[section_id]['invitees'],
-            })
+def _get_course_feed(term_id, sql, params, include_rooms=True, page=None, stream=False, total_count=None):
+    # In page mode, the caller provides 'total_count', the number of courses in the unpaginated feed.
+    if stream:
+        return _iterate_course_feed(term_id=term_id, sql=sql, params=params, include_rooms=include_rooms)
+    if page:
+        # One course more than the limit tells whether a next page exists.
+        sql, params = _get_page_of_sql(sql=sql, params=params, page={**page, 'limit': page['limit'] + 1})
+    courses = _assemble_course_feed(term_id=term_id, sql=sql, params=params, include_rooms=include_rooms)
+    if page:
+        last = courses[page['limit'] - 1] if len(courses) > page['limit'] else None
+        return {
+            'courses': courses[:page['limit']],
+            'nextCursor': last and encode_cursor([last['courseTitle'], last['sectionId']]),
+            'totalCount': total_count,
+        }
+    else:
+        return courses
 
-    api_json = []
-    for section_id, course in courses_per_id.items():
-        room_id = course.get('room', {}).get('id')
 
-        def _add_and_verify_room(approval_or_scheduled):
-            action_room_id = approval_or_scheduled.get('room', {}).get('id')
-            is_obsolete_room = not room_id or room_id != action_room_id
-            approval_or_scheduled['hasObsoleteRoom'] = is_obsolete_room
+def _assemble_course_feed(term_id, sql, params, include_rooms):
+    if app.config['COURSE_FEED_JSON_AGGREGATION']:
+        return _get_aggregated_course_feed(term_id=term_id, sql=sql, params=params, include_rooms=include_rooms)
+    else:
+        rows = db.session.execute(text(f'{sql} ORDER BY s.course_title, s.section_id, s.instructor_uid'), params)
+        return _to_api_json(term_id=term_id, rows=rows, include_rooms=include_rooms)
+
+
+def _iterate_course_feed(term_id, sql, params, include_rooms):
+    # Yield courses one at a time. A single server-side cursor walks the feed in order and batches of sections are
+    # assembled in turn, so memory use is bounded by batch size and the feed query runs once.
+    batch_size = app.config['COURSE_FEED_STREAM_BATCH_SIZE']
+    json_aggregation = app.config['COURSE_FEED_JSON_AGGREGATION']
+    if json_aggregation:
+        sql, params = _get_aggregation_sql(term_id=term_id, sql=sql, params=params)
+    else:
+        sql = f'{sql} ORDER BY s.course_title, s.section_id, s.instructor_uid'
+    rows = db.session.connection().execution_options(stream_results=True).execute(text(sql), params)
+    try:
+        if json_aggregation:
+            # One row per course.
+            while True:
+                batch = rows.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield from _finish_aggregated_courses(courses=[row['course'] for row in batch], include_rooms=include_rooms)
+        else:
+            # Rows of a section are adjacent, per sort order.
+            batch = []
+            section_ids = set()
+            for row in rows:
+                if row['section_id'] not in section_ids and len(section_ids) == batch_size:
+                    yield from _to_api_json(term_id=term_id, rows=batch, include_rooms=include_rooms)
+                    batch = []
+                    section_ids = set()
+                batch.append(row)
+                section_ids.add(row['section_id'])
+            if batch:
+                yield from _to_api_json(term_id=term_id, rows=batch, include_rooms=include_rooms)
+    finally:
+        rows.close()
+
+
+def _get_page_of_sql(sql, params, page):
+    # Keyset pagination on (course_title, section_id), the sort order of course feeds. Null titles sort last.
+    after = page['after']
+    if after is None:
+        keyset = 'TRUE'
+    elif after[0] is None:
+        keyset = 'course_title IS NULL AND section_id > :after_section_id'
+    else:
+        keyset = '(course_title, section_id) > (:after_course_title, :after_section_id) OR course_title IS NULL'
+    # Subqueries, not a CTE: Postgres inlines them, so that keyset and limit apply to the base tables and the feed query
+    # is not materialized.
+    paginated_sql = f"""
+        SELECT s.*
+        FROM ({sql}) s
+        JOIN (
+            SELECT DISTINCT course_title, section_id
+            FROM ({sql}) u
+            WHERE {keyset}
+            ORDER BY course_title, section_id
+            LIMIT :page_limit
+        ) p ON p.section_id = s.section_id
+    """
+    return paginated_sql, {
+        **params,
+        'after_course_title': after and after[0],
+        'after_section_id': after and after[1],
+        'page_limit': page['limit'],
+    }
+
+
+def _paginate_courses(courses, page):
+    after = page['after']
+    keys = [[c['courseTitle'], c['sectionId']] for c in courses]
+    if after is None:
+        remaining = courses
+    elif after in keys:
+        # Courses are in database collation order, so position is the reliable reference.
+        remaining = courses[keys.index(after) + 1:]
+    else:
+        def _sort_key(course_title, section_id):
+            return course_title is None, course_title or '', section_id
+        remaining = [c for c, key in zip(courses, keys) if _sort_key(*key) > _sort_key(*after)]
+    courses_of_page = remaining[:page['limit']]
+    last = courses_of_page[-1] if len(remaining) > page['limit'] else None
+    return {
+        'courses': courses_of_page,
+        'nextCursor': last and encode_cursor([last['courseTitle'], last['sectionId']]),
+        'totalCount': len(courses),
+    }
+
+
+def _get_aggregated_course_feed(term_id, sql, params, include_rooms=True):
+    # Postgres assembles one JSON document per course. What remains for Python: CalNet profiles of approvers, room
+    # feeds, display formatting of meeting times and the checks that derive from these.
+    aggregation_sql, aggregation_params = _get_aggregation_sql(term_id=term_id, sql=sql, params=params)
+    rows = db.session.execute(text(aggregation_sql), aggregation_params)
+    return _finish_aggregated_courses(courses=[row['course'] for row in rows], include_rooms=include_rooms)
+
+
+def _get_aggregation_sql(term_id, sql, params):
+    aggregation_sql = f"""
+        WITH feed AS (
+            {sql}
+        ),
+        sections AS (
+            SELECT DISTINCT ON (section_id) *
+            FROM feed
+            ORDER BY section_id, instructor_uid
+        ),
+        instructors AS (
+            SELECT section_id, json_agg(
+                json_build_object(
+                    'deptCode', instructor_dept_code,
+                    'email', instructor_email,
+                    'name', instructor_name,
+                    'roleCode', instructor_role_code,
+                    'uid', instructor_uid
+                ) ORDER BY instructor_uid
+            ) AS instructors
+            FROM (
+                SELECT DISTINCT ON (section_id, instructor_uid) *
+                FROM feed
+                ORDER BY section_id, instructor_uid
+            ) f
+            GROUP BY section_id
+        ),
+        listings AS (
+            SELECT l.section_id, unnest(l.cross_listed_section_ids) AS cross_listed_section_id
+            FROM cross_listings l
+            JOIN sections s ON s.section_id = l.section_id
+            WHERE l.term_id = :term_id
+        ),
+        cross_listed_courses AS (
+            SELECT l.section_id, json_agg(
+                json_build_object(
+                    'courseTitle', x.course_title,
+                    'isPrimary', x.is_primary,
+                    'label', concat(x.course_name, ', ', x.instruction_format, ' ', x.section_num),
+                    'sectionId', x.section_id,
+                    'termId', x.term_id
+                ) ORDER BY x.course_title, x.section_id
+            ) AS cross_listings
+            FROM listings l
+            JOIN (
+                SELECT DISTINCT section_id, is_primary, course_name, course_title, instruction_format, section_num, term_id
+                FROM sis_sections
+                WHERE term_id = :term_id
+            ) x ON x.section_id = l.cross_listed_section_id
+            GROUP BY l.section_id
+        ),
+        approvals_per_section AS (
+            SELECT s.section_id, json_agg(
+                json_build_object(
+                    'approvedByUid', a.approved_by_uid,
+                    'wasApprovedByAdmin', a.approver_type = 'admin',
+                    'createdAt', to_char(a.created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'),
+                    'crossListedSectionIds', a.cross_listed_section_ids,
+                    'publishType', a.publish_type,
+                    'publishTypeName', CAST(:publish_type_names AS JSON) ->> CAST(a.publish_type AS TEXT),
+                    'recordingType', a.recording_type,
+                    'recordingTypeName', CAST(:recording_type_names AS JSON) ->> CAST(a.recording_type AS TEXT),
+                    'roomId', a.room_id,
+                    'sectionId', a.section_id,
+                    'termId', a.term_id
+                ) ORDER BY a.created_at
+            ) AS approvals
+            FROM (
+                SELECT section_id, section_id AS approval_section_id FROM sections
+                UNION ALL
+                SELECT section_id, cross_listed_section_id FROM listings
+            ) s
+            JOIN approvals a ON a.section_id = s.approval_section_id AND a.term_id = :term_id
+            GROUP BY s.section_id
+        ),
+        invitees AS (
+            SELECT e.section_id, json_agg(r.uid ORDER BY e.sent_at, e.id, r.ordinality) AS invitees
+            FROM sent_emails e
+            JOIN sections s ON s.section_id = e.section_id
+            LEFT JOIN LATERAL unnest(e.recipient_uids) WITH ORDINALITY AS r(uid, ordinality) ON TRUE
+            WHERE e.term_id = :term_id AND e.template_type = 'invitation'
+            GROUP BY e.section_id
+        ),
+        canvas_course_sites AS (
+            SELECT c.section_id, json_agg(
+                json_build_object(
+                    'courseSiteId', c.canvas_course_site_id,
+                    'courseSiteName', c.canvas_course_site_name
+                )
+            ) AS canvas_course_sites
+            FROM canvas_course_sites c
+            JOIN sections s ON s.section_id = c.section_id
+            WHERE c.term_id = :term_id
+            GROUP BY c.section_id
+        )
+        SELECT json_build_object(
+            'allowedUnits', s.allowed_units,
+            'approvals', COALESCE(a.approvals, '[]'),
+            'canvasCourseSites', COALESCE(c.canvas_course_sites, '[]'),
+            'courseName', s.course_name,
+            'courseTitle', s.course_title,
+            'crossListings', COALESCE(x.cross_listings, '[]'),
+            'hasOptedOut', p.section_id IS NOT NULL,
+            'instructionFormat', s.instruction_format,
+            'instructors', i.instructors,
+            'invitees', COALESCE(e.invitees, '[]'),
+            'isInvited', e.invitees IS NOT NULL,
+            'isPrimary', s.is_primary,
+            'label', concat(s.course_name, ', ', s.instruction_format, ' ', s.section_num),
+            'meetingDays', s.meeting_days,
+            'meetingEndDate', s.meeting_end_date,
+            'meetingEndTime', s.meeting_end_time,
+            'meetingLocation', s.meeting_location,
+            'meetingStartDate', s.meeting_start_date,
+            'meetingStartTime', s.meeting_start_time,
+            'roomId', s.room_id,
+            'scheduled', CASE WHEN d.section_id IS NULL THEN NULL ELSE json_build_object(
+                'createdAt', to_char(d.created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'),
+                'crossListedSectionIds', d.cross_listed_section_ids,
+                'instructorUids', d.instructor_uids,
+                'meetingDays', d.meeting_days,
+                'meetingEndTime', d.meeting_end_time,
+                'meetingStartTime', d.meeting_start_time,
+                'publishType', d.publish_type,
+                'publishTypeName', CAST(:publish_type_names AS JSON) ->> CAST(d.publish_type AS TEXT),
+                'recordingType', d.recording_type,
+                'recordingTypeName', CAST(:recording_type_names AS JSON) ->> CAST(d.recording_type AS TEXT),
+                'roomId', d.room_id,
+                'sectionId', d.section_id,
+                'termId', d.term_id
+            ) END,
+            'sectionId', s.section_id,
+            'sectionNum', s.section_num,
+            'termId', s.term_id
+        ) AS course
+        FROM sections s
+        JOIN instructors i ON i.section_id = s.section_id
+        LEFT JOIN cross_listed_courses x ON x.section_id = s.section_id
+        LEFT JOIN approvals_per_section a ON a.section_id = s.section_id
+        LEFT JOIN invitees e ON e.section_id = s.section_id
+        LEFT JOIN canvas_course_sites c ON c.section_id = s.section_id
+        LEFT JOIN scheduled d ON d.section_id = s.section_id AND d.term_id = :term_id
+        LEFT JOIN course_preferences p ON p.section_id = s.section_id AND p.term_id = :term_id AND p.has_opted_out IS TRUE
+        ORDER BY s.course_title, s.section_id
+    """
+    return aggregation_sql, {
+        **params,
+        'term_id': term_id,
+        'publish_type_names': json.dumps(NAMES_PER_PUBLISH_TYPE),
+        'recording_type_names': json.dumps(NAMES_PER_RECORDING_TYPE),
+    }
+
 
-        course['instructors'] = instructors_per_section_id[section_id]
-        course['hasNecessaryApprovals'] = _has_necessary_approvals(course)
+def _finish_aggregated_courses(courses, include_rooms):
+    room_ids = set()
+    for course in courses:
+        room_ids.add(course['roomId'])
+        room_ids.update(a['roomId'] for a in course['approvals'])
+        if course['scheduled']:
+            room_ids.add(course['scheduled']['roomId'])
+    rooms_by_id = dict((room.id, room.to_api_json()) for room in Room.get_rooms(list(room_ids))) if room_ids else {}
+
+    # Profiles of all approvers are resolved in bulk.
+    approver_uids = [a['approvedByUid'] for course in courses for a in course['approvals']]
+    profiles_per_uid = get_user_profiles_per_uid(app=app, uids=approver_uids)
+
+    api_json = []
+    for course in courses:
+        for approval in course['approvals']:
+            approval['approvedBy'] = profiles_per_uid[approval.pop('approvedByUid')]
+            approval['room'] = rooms_by_id.get(approval.pop('roomId'))
         scheduled = course['scheduled']
-        # Check for course changes w.r.t. room, meeting times, and instructors.
         if scheduled:
-            def _meeting(obj):
-                return f'{obj["meetingDays"]}-{obj["meetingStartTime"]}-{obj["meetingEndTime"]}'
+            scheduled['meetingDays'] = format_days(scheduled['meetingDays'])
+            scheduled['meetingEndTime'] = format_time(scheduled['meetingEndTime'])
+            scheduled['meetingStartTime'] = format_time(scheduled['meetingStartTime'])
+            scheduled['room'] = rooms_by_id.get(scheduled.pop('roomId'))
+        course['invitees'] = [uid for uid in course['invitees'] if uid]
+        course['meetingDays'] = format_days(course['meetingDays'])
+        course['meetingEndTime'] = format_time(course['meetingEndTime'])
+        course['meetingStartTime'] = format_time(course['meetingStartTime'])
+        if scheduled:
+            course['status'] = 'Scheduled'
+        elif course['approvals']:
+            course['status'] = 'Partially Approved'
+        else:
+            course['status'] = 'Invited' if course['isInvited'] else 'Not Invited'
+        del course['isInvited']
 
-            instructor_uids = set([instructor['uid'] for instructor in course['instructors']])
-            scheduled['hasObsoleteInstructors'] = instructor_uids != set(scheduled['instructorUids'])
-            scheduled['hasObsoleteMeetingTimes'] = _meeting(course) != _meeting(scheduled)
-            _add_and_verify_room(scheduled)
+        room_id = course.pop('roomId')
+        if include_rooms:
+            course['room'] = rooms_by_id.get(room_id)
+
+        _add_instructors(course, course['instructors'])
+        _verify_approvals_and_scheduled(course)
+        api_json.append(course)
+    return api_json
 
-        for approval in course['approvals']:
-            _add_and_verify_room(approval)
+
+def _to_api_json(term_id, rows, include_rooms=True):
+    course_records_per_id = _get_course_records_per_id(rows)
+    if not course_records_per_id:
+        return []
+
+    # Related data of all sections is fetched in a fixed number of queries, regardless of feed size.
+    section_ids = list(course_records_per_id.keys())
+    section_ids_opted_out = set(CoursePreference.get_section_ids_opted_out(term_id=term_id))
+    cross_listings_per_section_id = _get_cross_listed_courses(section_ids=section_ids, term_id=term_id)
+    all_section_ids = set(section_ids)
+    for cross_listings in cross_listings_per_section_id.values():
+        all_section_ids.update(c['sectionId'] for c in cross_listings)
+    # Approvals are kept in order of creation, per the query.
+    approvals_per_section_id = {}
+    for index, approval in enumerate(Approval.get_approvals_per_section_ids(section_ids=list(all_section_ids), term_id=term_id)):
+        approvals_per_section_id.setdefault(approval.section_id, []).append((index, approval))
+    scheduled_per_section_id = dict(
+        (s.section_id, s) for s in Scheduled.get_scheduled_per_section_ids(section_ids=section_ids, term_id=term_id)
+    )
+    invites_per_section_id = objects_to_dict_organized_by_section_id(
+        objects=SentEmail.get_emails_of_type_per_section_ids(
+            section_ids=section_ids,
+            template_type='invitation',
+            term_id=term_id,
+        ),
+    )
+    canvas_course_sites_per_section_id = _canvas_course_sites(term_id=term_id, section_ids=section_ids)
+    room_ids = set(record.room_id for record in course_records_per_id.values())
+    room_ids.update(s.room_id for s in scheduled_per_section_id.values())
+    for approvals in approvals_per_section_id.values():
+        room_ids.update(a.room_id for index, a in approvals)
+    rooms_by_id = dict((room.id, room.to_api_json()) for room in Room.get_rooms([id_ for id_ in room_ids if id_]))
+    # Profiles of all approvers are resolved in bulk.
+    profiles_per_uid = get_user_profiles_per_uid(
+        app=app,
+        uids=[a.approved_by_uid for approvals in approvals_per_section_id.values() for index, a in approvals],
+    )
+
+    api_json = []
+    for section_id, record in course_records_per_id.items():
+        course = record.to_api_json()
+        cross_listings = cross_listings_per_section_id.get(section_id, [])
+        approvals = []
+        for id_ in [section_id] + [c['sectionId'] for c in cross_listings]:
+            approvals.extend(approvals_per_section_id.get(id_, []))
+        approvals = [
+            a.to_api_json(rooms_by_id=rooms_by_id, profiles_per_uid=profiles_per_uid)
+            for index, a in sorted(approvals, key=lambda t: t[0])
+        ]
+        scheduled = scheduled_per_section_id.get(section_id)
+        invites = invites_per_section_id.get(section_id, [])
+        course.update({
+            'approvals': approvals,
+            'canvasCourseSites': canvas_course_sites_per_section_id.get(section_id, []),
+            'crossListings': cross_listings,
+            'hasOptedOut': section_id in section_ids_opted_out,
+            'invitees': [uid for invite in invites for uid in invite.recipient_uids],
+            'scheduled': scheduled and scheduled.to_api_json(rooms_by_id=rooms_by_id),
+        })
+        if scheduled:
+            course['status'] = 'Scheduled'
+        elif approvals:
+            course['status'] = 'Partially Approved'
+        else:
+            course['status'] = 'Invited' if invites else 'Not Invited'
+
+        if include_rooms:
+            course['room'] = rooms_by_id.get(record.room_id)
+
+        _add_instructors(course, [instructor.to_api_json() for instructor in record.instructors_per_uid.values()])
+        _verify_approvals_and_scheduled(course)
 
         # Add course to the feed
         api_json.append(course)
     return api_json
 
 
-def _get_approvals_and_scheduled(section_ids, term_id):
-    approvals = Approval.get_approvals_per_section_ids(section_ids=section_ids, term_id=term_id)
-    scheduled = None
-    for section_id in section_ids:
-        if not scheduled:
-            scheduled = Scheduled.get_scheduled(section_id=section_id, term_id=term_id)
-            scheduled = scheduled and scheduled.to_api_json()
-            break
-    return [a.to_api_json() for a in approvals], scheduled
+class _InstructorRecord:
+    # Plain attributes, no per-instance dict. Converted to camelCase JSON only when the feed is assembled.
+    __slots__ = ('dept_code', 'email', 'name', 'role_code', 'uid')
+
+    def __init__(self, row):
+        self.dept_code = row['instructor_dept_code']
+        self.email = row['instructor_email']
+        self.name = row['instructor_name']
+        self.role_code = row['instructor_role_code']
+        self.uid = row['instructor_uid']
+
+    def to_api_json(self):
+        return {
+            'deptCode': self.dept_code,
+            'email': self.email,
+            'name': self.name,
+            'roleCode': self.role_code,
+            'uid': self.uid,
+        }
 
 
-def _canvas_course_sites(term_id, section_id):
-    canvas_course_sites = []
-    for row in CanvasCourseSite.get_canvas_course_sites(term_id=term_id, section_id=section_id):
-        canvas_course_sites.append({
+class _CourseRecord:
+    # One per section. Display values (label, meeting days and times) are computed once, when the record is created.
+    __slots__ = (
+        'allowed_units',
+        'course_name',
+        'course_title',
+        'instruction_format',
+        'instructors_per_uid',
+        'is_primary',
+        'label',
+        'meeting_days',
+        'meeting_end_date',
+        'meeting_end_time',
+        'meeting_location',
+        'meeting_start_date',
+        'meeting_start_time',
+        'room_id',
+        'section_id',
+        'section_num',
+        'term_id',
+    )
+
+    def __init__(self, row, section_id):
+        self.allowed_units = row['allowed_units']
+        self.course_name = row['course_name']
+        self.course_title = row['course_title']
+        self.instruction_format = row['instruction_format']
+        self.instructors_per_uid = {}
+        self.is_primary = row['is_primary']
+        self.label = f"{self.course_name}, {self.instruction_format} {row['section_num']}"
+        self.meeting_days = format_days(row['meeting_days'])
+        self.meeting_end_date = row['meeting_end_date']
+        self.meeting_end_time = format_time(row['meeting_end_time'])
+        self.meeting_location = row['meeting_location']
+        self.meeting_start_date = row['meeting_start_date']
+        self.meeting_start_time = format_time(row['meeting_start_time'])
+        self.room_id = row['room_id']
+        self.section_id = section_id
+        self.section_num = row['section_num']
+        self.term_id = row['term_id']
+
+    def to_api_json(self):
+        return {
+            'allowedUnits': self.allowed_units,
+            'courseName': self.course_name,
+            'courseTitle': self.course_title,
+            'instructionFormat': self.instruction_format,
+            'instructors': [],
+            'isPrimary': self.is_primary,
+            'label': self.label,
+            'meetingDays': self.meeting_days,
+            'meetingEndDate': self.meeting_end_date,
+            'meetingEndTime': self.meeting_end_time,
+            'meetingLocation': self.meeting_location,
+            'meetingStartDate': self.meeting_start_date,
+            'meetingStartTime': self.meeting_start_time,
+            'sectionId': self.section_id,
+            'sectionNum': self.section_num,
+            'termId': self.term_id,
+        }
+
+
+def _get_course_records_per_id(rows):
+    course_records_per_id = {}
+    # If course has multiple instructors then the section_id will be represented across multiple rows.
+    for row in rows:
+        section_id = int(row['section_id'])
+        record = course_records_per_id.get(section_id)
+        if record is None:
+            record = course_records_per_id[section_id] = _CourseRecord(row, section_id=section_id)
+        # Build upon course record with one instructor per row.
+        instructor_uid = row['instructor_uid']
+        if instructor_uid not in record.instructors_per_uid:
+            record.instructors_per_uid[instructor_uid] = _InstructorRecord(row)
+    return course_records_per_id
+
+
+def _add_instructors(course, instructors):
+    approvals_per_uid = {}
+    for approval in course['approvals']:
+        approvals_per_uid.setdefault(approval['approvedBy']['uid'], approval)
+    invitees = set(course['invitees'])
+    for instructor in instructors:
+        instructor['approval'] = approvals_per_uid.get(instructor['uid'], False)
+        instructor['wasSentInvite'] = instructor['uid'] in invitees
+    course['instructors'] = instructors
+    course['hasNecessaryApprovals'] = _has_necessary_approvals(course)
+
+
+def _verify_approvals_and_scheduled(course):
+    room_id = course.get('room', {}).get('id')
+
+    def _add_and_verify_room(approval_or_scheduled):
+        action_room_id = approval_or_scheduled.get('room', {}).get('id')
+        is_obsolete_room = not room_id or room_id != action_room_id
+        approval_or_scheduled['hasObsoleteRoom'] = is_obsolete_room
+
+    scheduled = course['scheduled']
+    # Check for course changes w.r.t. room, meeting times, and instructors.
+    if scheduled:
+        def _meeting(obj):
+            return f'{obj["meetingDays"]}-{obj["meetingStartTime"]}-{obj["meetingEndTime"]}'
+
+        instructor_uids = set([instructor['uid'] for instructor in course['instructors']])
+        scheduled['hasObsoleteInstructors'] = instructor_uids != set(scheduled['instructorUids'])
+        scheduled['hasObsoleteMeetingTimes'] = _meeting(course) != _meeting(scheduled)
+        _add_and_verify_room(scheduled)
+
+    for approval in course['approvals']:
+        _add_and_verify_room(approval)
+
+
+def _canvas_course_sites(term_id, section_ids):
+    canvas_course_sites_per_section_id = {}
+    for row in CanvasCourseSite.get_canvas_course_sites_per_section_ids(term_id=term_id, section_ids=section_ids):
+        canvas_course_sites_per_section_id.setdefault(row.section_id, []).append({
             'courseSiteId': row.canvas_course_site_id,
             'courseSiteName': row.canvas_course_site_name,
         })
-    return canvas_course_sites
+    return canvas_course_sites_per_section_id
 
 
-def _get_cross_listed_courses(section_id, term_id):
-    section_ids = CrossListing.get_cross_listed_sections(section_id=section_id, term_id=term_id)
+def _get_cross_listed_courses(section_ids, term_id):
+    cross_listed_section_ids_per_section_id = dict(
+        (row.section_id, row.cross_listed_section_ids)
+        for row in CrossListing.get_cross_listings_per_section_ids(section_ids=section_ids, term_id=term_id)
+    )
+    if not cross_listed_section_ids_per_section_id:
+        return {}
+    all_cross_listed_section_ids = set()
+    for cross_listed_section_ids in cross_listed_section_ids_per_section_id.values():
+        all_cross_listed_section_ids.update(cross_listed_section_ids)
     sql = f"""
         SELECT DISTINCT section_id, is_primary, course_name, course_title, instruction_format, section_num, term_id
         FROM sis_sections
@@ -687,7 +1134,7 @@ def _get_cross_listed_courses(section_id, term_id):
     rows = db.session.execute(
         text(sql),
         {
-            'section_ids': section_ids,
+            'section_ids': list(all_cross_listed_section_ids),
             'term_id': term_id,
         },
     )
@@ -700,13 +1147,21 @@ def _get_cross_listed_courses(section_id, term_id):
             'sectionId': row['section_id'],
             'termId': row['term_id'],
         }
-    return [_to_json(row) for row in rows]
+    cross_listed_courses = [_to_json(row) for row in rows]
+    cross_listed_course_indexes_per_id = dict((c['sectionId'], index) for index, c in enumerate(cross_listed_courses))
+    cross_listed_courses_per_section_id = {}
+    for section_id, cross_listed_section_ids in cross_listed_section_ids_per_section_id.items():
+        # Keep the sort order of the query. Each section gets its own copy of the JSON.
+        indexes = sorted(set(
+            cross_listed_course_indexes_per_id[id_] for id_ in cross_listed_section_ids if id_ in cross_listed_course_indexes_per_id
+        ))
+        cross_listed_courses_per_section_id[section_id] = [dict(cross_listed_courses[index]) for index in indexes]
+    return cross_listed_courses_per_section_id
 
 
 def _has_necessary_approvals(course):
     if any(a['wasApprovedByAdmin'] for a in course['approvals']):
         return True
     else:
-        approval_uids = [a['approvedBy']['uid'] for a in course['approvals']]
-        necessary_approval_uids = [i['uid'] for i in course['instructors']]
-        return all(uid in approval_uids for uid in necessary_approval_uids)
+        approval_uids = set(a['approvedBy']['uid'] for a in course['approvals'])
+        return all(i['uid'] in approval_uids for i in course['instructors'])
@@ -0,0 +1,89 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+from diablo import db, std_commit
+from sqlalchemy import text
+
+# Row with this term_id carries the version of data shared by all terms (e.g., rooms).
+ALL_TERMS = 0
+
+# Key, in session info, of bumps not yet flushed: section ids, or None for all sections, per term_id.
+_PENDING_BUMPS_KEY = 'pending_term_version_bumps'
+
+
+class TermVersion(db.Model):
+    __tablename__ = 'term_versions'
+
+    term_id = db.Column(db.Integer, nullable=False, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"""<TermVersion
+                    term_id={self.term_id},
+                    version={self.version}>
+                """
+
+    @classmethod
+    def bump(cls, term_id=None, section_ids=None):
+        # The bump is deferred to flush_bumps, at the end of the request or job, so that a run of writes makes one bump.
+        # If the change is confined to certain sections then pass 'section_ids' and fewer cached user profiles are
+        # invalidated.
+        term_id = ALL_TERMS if term_id is None else int(term_id)
+        pending = db.session.info.setdefault(_PENDING_BUMPS_KEY, {})
+        if section_ids and (term_id not in pending or pending[term_id] is not None):
+            pending.setdefault(term_id, set()).update(int(section_id) for section_id in section_ids)
+        else:
+            # All sections of the term.
+            pending[term_id] = None
+
+    @classmethod
+    def flush_bumps(cls):
+        pending = db.session.info.pop(_PENDING_BUMPS_KEY, None)
+        if not pending:
+            return
+        # Versions are drawn from a sequence, so a value is never reused, not even by a rolled-back transaction.
+        sql = """
+            INSERT INTO term_versions (term_id, version)
+            SELECT term_id, nextval('term_versions_seq')
+            FROM unnest(CAST(:term_ids AS INTEGER[])) term_id
+            ON CONFLICT (term_id) DO UPDATE SET version = EXCLUDED.version
+        """
+        db.session.execute(text(sql), {'term_ids': sorted(pending.keys())})
+        std_commit()
+        from diablo.models.user import User
+        if ALL_TERMS in pending:
+            User.invalidate_cached_profiles()
+        else:
+            for term_id, section_ids in pending.items():
+                User.invalidate_cached_profiles(term_id=term_id, section_ids=section_ids and sorted(section_ids))
+
+    @classmethod
+    def get_version(cls, term_id):
+        # Version of term data, including the data shared by all terms. It increases with every bump. Bumps pending in
+        # this session are flushed first, so that its own writes are seen.
+        cls.flush_bumps()
+        sql = 'SELECT MAX(version) FROM term_versions WHERE term_id = ANY(:term_ids)'
+        version = db.session.execute(text(sql), {'term_ids': [ALL_TERMS, int(term_id)]}).scalar()
+        return version or 0
@@ -23,10 +23,13 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 ENHANCEMENTS, OR MODIFICATIONS.
 """
 
+import uuid
+
+from diablo import cache
 from diablo.merged import calnet
 from diablo.models.admin_user import AdminUser
-from diablo.models.room import Room
 from diablo.models.sis_section import SisSection
+from diablo.models.term_version import TermVersion
 from flask import current_app as app
 from flask_login import UserMixin
 
@@ -41,7 +44,12 @@ class User(UserMixin):
                 self.uid = None
         else:
             self.uid = None
-        self.api_json = self._get_api_json(self.uid)
+        # Authentication needs only the principal. The course feed is deferred until to_api_json() is called.
+        principal = _get_cached_profile(self.uid, 'principal', lambda: self._get_principal(self.uid))
+        # Admin status is never cached with the profile: admins can be granted or revoked in the database directly.
+        self._admin_status = self._get_admin_status(principal)
+        self.principal = {**principal, **self._admin_status}
+        self._api_json = None
 
     def get_id(self):
         # Type 'int' is required for Flask-login user_id
@@ -52,68 +60,138 @@ class User(UserMixin):
 
     @property
     def email_address(self):
-        return self.api_json['emailAddress']
+        return self.principal['emailAddress']
 
     @property
     def is_active(self):
-        return self.api_json['isActive']
+        return self.principal['isActive']
 
     @property
     def is_authenticated(self):
-        return self.api_json['isAuthenticated']
+        return self.principal['isAuthenticated']
 
     @property
     def is_anonymous(self):
-        return not self.api_json['isAnonymous']
+        return not self.principal['isAnonymous']
 
     @property
     def is_admin(self):
-        return self.api_json['isAdmin']
+        return self.principal['isAdmin']
 
     @property
     def name(self):
-        return self.api_json['name']
+        return self.principal['name']
 
     def to_api_json(self):
-        return self.api_json
+        if self._api_json is None:
+            api_json = _get_cached_profile(self.uid, 'api_json', self._get_api_json)
+            self._api_json = {**api_json, **self._admin_status}
+        return self._api_json
+
+    @classmethod
+    def invalidate_cached_profile(cls, uid):
+        _delete_cached_profiles([uid])
+
+    @classmethod
+    def invalidate_cached_profiles(cls, term_id=None, section_ids=None):
+        # Profiles include courses of the current term only. Without 'section_ids', all cached profiles are invalidated.
+        if term_id is not None and int(term_id) != app.config['CURRENT_TERM_ID']:
+            return
+        if term_id is not None and section_ids:
+            _delete_cached_profiles(SisSection.get_instructor_uids_of_sections(term_id=term_id, section_ids=section_ids))
+        else:
+            cache.delete(_PROFILE_GENERATION_KEY)
 
     @classmethod
     def load_user(cls, user_id):
-        return cls._get_api_json(uid=user_id)
+        return cls(user_id).to_api_json()
+
+    def _get_api_json(self):
+        courses = []
+        if self.principal['isActive']:
+            courses = SisSection.get_courses_per_instructor_uid(
+                term_id=app.config['CURRENT_TERM_ID'],
+                instructor_uid=self.uid,
+            )
+        return {
+            **self.principal,
+            'isTeaching': bool(courses),
+            'courses': courses,
+        }
+
+    @classmethod
+    def _get_admin_status(cls, principal):
+        # Per the in-memory roster of AdminUser. An admin is active whether or not teaching.
+        uid = principal['uid']
+        is_admin = bool(uid) and not principal.get('isExpiredPerLdap', True) and AdminUser.is_admin(uid)
+        is_active = principal['isActive'] or is_admin
+        return {
+            'isActive': is_active,
+            'isAdmin': is_admin,
+            'isAnonymous': not is_active,
+            'isAuthenticated': is_active,
+        }
 
     @classmethod
-    def _get_api_json(cls, uid=None):
+    def _get_principal(cls, uid=None):
+        # Admin status is left to _get_admin_status. Here, only instructors of the current term are active.
         calnet_profile = None
         email_address = None
         is_active = False
-        is_admin = False
-        courses = []
         if uid:
             calnet_profile = calnet.get_calnet_user_for_uid(app, uid)
             is_active = not calnet_profile.get('isExpiredPerLdap', True)
             if is_active:
                 email_address = calnet_profile.get('campusEmail') or calnet_profile.get('email')
-                is_admin = AdminUser.is_admin(uid)
-                courses = SisSection.get_courses_per_instructor_uid(
+                is_active = SisSection.is_teaching(
                     term_id=app.config['CURRENT_TERM_ID'],
                     instructor_uid=uid,
                 )
-                for course in courses:
-                    if course['meetingLocation']:
-                        room = Room.find_room(course['meetingLocation'])
-                        course['room'] = room and room.to_api_json()
-                is_active = is_admin or bool(courses)
         return {
             **(calnet_profile or {}),
             **{
                 'id': uid,
                 'emailAddress': email_address,
                 'isActive': is_active,
-                'isAdmin': is_admin,
+                'isAdmin': False,
                 'isAnonymous': not is_active,
                 'isAuthenticated': is_active,
-                'isTeaching': bool(courses),
-                'courses': courses,
                 'uid': uid,
             },
         }
+
+
+# Cached profiles are keyed by a random generation. Deleting the generation invalidates all of them at once. If the
+# generation is evicted from the cache then a new one is drawn, and nothing stale survives.
+_PROFILE_GENERATION_KEY = 'user_profile/generation'
+
+
+def _get_profile_generation():
+    generation = cache.get(_PROFILE_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(_PROFILE_GENERATION_KEY, generation, timeout=0):
+            # Another process got there first.
+            generation = cache.get(_PROFILE_GENERATION_KEY) or generation
+    return generation
+
+
+def _delete_cached_profiles(uids):
+    generation = _get_profile_generation()
+    keys = [f'user_profile/{generation}/{uid}/{name}' for uid in uids for name in ['api_json', 'principal']]
+    if keys:
+        cache.delete_many(*keys)
+
+
+def _get_cached_profile(uid, name, get_value):
+    # Cached values expire with the inactive session. See INACTIVE_SESSION_LIFETIME.
+    if not uid:
+        return get_value()
+    # Invalidations due to writes of this session, if any, come first.
+    TermVersion.flush_bumps()
+    key = f'user_profile/{_get_profile_generation()}/{uid}/{name}'
+    value = cache.get(key)
+    if value is None:
+        value = get_value()
+        cache.set(key, value, timeout=app.config['INACTIVE_SESSION_LIFETIME'] * 60)
+    return value
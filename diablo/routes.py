@@ -78,6 +78,19 @@ def register_routes(app):
         app.permanent_session_lifetime = datetime.timedelta(minutes=app.config['INACTIVE_SESSION_LIFETIME'])
         session.modified = True
 
+    @app.after_request
+    def flush_term_version_bumps(response):
+        # Before the response goes out, so that the client's next request sees a new version.
+        from diablo.models.term_version import TermVersion
+        TermVersion.flush_bumps()
+        return response
+
+    @app.teardown_appcontext
+    def flush_term_version_bumps_of_job(exception=None):
+        # Background jobs and scripts run outside of a request.
+        from diablo.models.term_version import TermVersion
+        TermVersion.flush_bumps()
+
     @app.after_request
     def after_api_request(response):
         if app.config['DIABLO_ENV'] == 'development':
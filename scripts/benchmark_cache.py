@@ -0,0 +1,87 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+import argparse
+import tempfile
+import time
+
+from diablo.lib.tiered_cache import TieredCache
+from flask_caching.backends import FileSystemCache
+
+"""Measure cache hit latency: the filesystem backend alone versus the in-process LRU of TieredCache in front of it.
+
+Nothing is written outside of a temporary directory and no app is created.
+
+    diablo> PYTHONPATH=. python scripts/benchmark_cache.py --keys 2000
+"""
+
+KEY_PATTERN = 'calnet/user_for_uid_{uid}'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--keys', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    users_per_key = dict((KEY_PATTERN.format(uid=uid), _calnet_user(uid)) for uid in range(1000000, 1000000 + args.keys))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        filesystem_cache = FileSystemCache(cache_dir, threshold=args.keys * 2)
+        tiered_cache = TieredCache(
+            shared=filesystem_cache,
+            local_tiers={KEY_PATTERN: {'max_size': args.keys, 'timeout': 300}},
+        )
+        for label, cache in [('Filesystem', filesystem_cache), ('Tiered (in-process LRU)', tiered_cache)]:
+            cache.set_many(users_per_key)
+            for get_label, get_all in [
+                ('get', lambda: [cache.get(key) for key in users_per_key]),
+                ('get_many', lambda: cache.get_many(*users_per_key.keys())),
+            ]:
+                elapsed = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    values = get_all()
+                    elapsed.append(time.perf_counter() - start)
+                    assert None not in values
+                per_hit = min(elapsed) / args.keys * 1000000
+                print(f'{label}, {get_label}: {args.keys} hits, best of {args.runs} runs = {per_hit:.1f} µs per hit')
+
+
+def _calnet_user(uid):
+    return {
+        'campusEmail': f'{uid}@berkeley.edu',
+        'deptCode': 'ENGIN',
+        'email': f'{uid}@example.com',
+        'firstName': 'Ada',
+        'isExpiredPerLdap': False,
+        'lastName': f'Lovelace {uid}',
+        'name': f'Ada Lovelace {uid}',
+        'title': 'Professor',
+        'uid': str(uid),
+    }
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+import argparse
+import time
+
+from diablo.externals.calnet import _attributes_to_dict, SCHEMA_DICT, SEARCH_ATTRIBUTES
+import ldap3
+
+"""Measure CalNet bulk lookups against a synthetic directory served by ldap3's mock strategy (no network, no app).
+
+1. Payload size and client-side CPU of search results: all attributes versus the attributes of SCHEMA_DICT.
+2. Matching results back to requested uids: linear scan per uid versus a uid-to-entry index.
+
+    diablo> PYTHONPATH=. python scripts/benchmark_calnet.py --people 5000
+"""
+
+# Real directory entries carry many attributes that Diablo never reads.
+UNUSED_ATTRIBUTES = [
+    'berkeleyEduAffID', 'berkeleyEduAlternateID', 'berkeleyEduConfidentialFlag', 'berkeleyEduEmailRelFlag',
+    'berkeleyEduFirstName', 'berkeleyEduHomeAddress', 'berkeleyEduHomePhone', 'berkeleyEduKerberosPrincipalString',
+    'berkeleyEduLastName', 'berkeleyEduMailDelivery', 'berkeleyEduModDate', 'berkeleyEduPersonAddress',
+    'berkeleyEduStuID', 'berkeleyEduUCPathID', 'description', 'employeeNumber', 'facsimileTelephoneNumber',
+    'labeledURI', 'objectClass', 'postalAddress', 'roomNumber', 'street', 'telephoneNumber',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--people', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    conn = _mock_directory(people_count=args.people)
+    for label, attributes in [('All attributes', ldap3.ALL_ATTRIBUTES), ('SCHEMA_DICT attributes', SEARCH_ATTRIBUTES)]:
+        payload_size = 0
+        elapsed = []
+        for _ in range(args.runs):
+            conn.search('dc=berkeley,dc=edu', '(objectclass=person)', attributes=attributes)
+            payload_size = sum(
+                len(name) + sum(len(value) for value in values)
+                for entry in conn.response for name, values in entry['raw_attributes'].items()
+            )
+            # Client-side cost: decode entries and map attributes, per Client.search_uids.
+            start = time.perf_counter()
+            people = [_attributes_to_dict(entry, False) for entry in conn.entries]
+            elapsed.append(time.perf_counter() - start)
+        print(f'{label}: {len(people)} people, {payload_size / 1024:.0f} KiB of attribute values, '
+              f'best of {args.runs} runs = {min(elapsed):.3f}s to decode')
+
+    uids = [person['uid'] for person in people]
+    start = time.perf_counter()
+    for uid in uids:
+        next((p for p in people if p['uid'] == uid), None)
+    print(f'Linear scan per uid: {time.perf_counter() - start:.3f}s')
+    start = time.perf_counter()
+    people_per_uid = {}
+    for person in people:
+        people_per_uid.setdefault(person['uid'], person)
+    for uid in uids:
+        people_per_uid.get(uid)
+    print(f'Index by uid: {time.perf_counter() - start:.3f}s')
+
+
+def _mock_directory(people_count):
+    # No schema, so that campus-specific attribute names are accepted.
+    server = ldap3.Server('calnet-mock', get_info=ldap3.NONE)
+    conn = ldap3.Connection(server, user='cn=bind', password='secret', client_strategy=ldap3.MOCK_SYNC)
+    conn.strategy.add_entry('cn=bind', {'userPassword': 'secret'})
+    for n in range(people_count):
+        uid = str(1000000 + n)
+        attributes = dict((attribute, f'{attribute} of person {uid}') for attribute in SCHEMA_DICT)
+        attributes.update(dict((attribute, f'{attribute} of person {uid}, unused by Diablo') for attribute in UNUSED_ATTRIBUTES))
+        attributes.update({'objectClass': ['person', 'berkeleyEduPerson'], 'ou': 'people', 'uid': uid})
+        conn.strategy.add_entry(f'uid={uid},ou=people,dc=berkeley,dc=edu', attributes)
+    conn.bind()
+    return conn
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from diablo import db
+from diablo.factory import create_app
+from diablo.lib.util import format_days, format_time
+from diablo.models.course_status import CourseStatus
+from diablo.models.sis_section import _COURSE_FEED_COLUMNS, _get_course_records_per_id, SisSection
+from sqlalchemy import text
+
+"""Compare course-feed assembly by Python against assembly by Postgres (COURSE_FEED_JSON_AGGREGATION), per-section
+intermediates as plain dicts against slotted records (_CourseRecord and _InstructorRecord), the time to a page of a
+filter feed, and peak memory of a full filter feed against a streamed one (COURSE_FEED_STREAMING).
+
+Synthetic sections, instructors, rooms, invitations, approvals and recordings are inserted into a made-up term and
+rolled back when done. Nothing is committed. Approvers are synthetic instructors, so their profiles come from the local
+instructors table. Cached feeds are skipped by a new version of the made-up term, not by clearing the shared cache.
+
+    diablo> DIABLO_ENV=test PYTHONPATH=. python scripts/benchmark_course_feeds.py --sections 10000
+"""
+
+TERM_ID = 9999
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sections', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            _insert_synthetic_term(section_count=args.sections)
+            section_ids = [row['section_id'] for row in db.session.execute(
+                text('SELECT DISTINCT section_id FROM sis_sections WHERE term_id = :term_id'),
+                {'term_id': TERM_ID},
+            )]
+            feeds = {}
+            for json_aggregation in [False, True]:
+                app.config['COURSE_FEED_JSON_AGGREGATION'] = json_aggregation
+                elapsed = []
+                for _ in range(args.runs):
+                    # Measure assembly, not cache hits.
+                    _skip_cached_feeds()
+                    start = time.perf_counter()
+                    feeds[json_aggregation] = SisSection.get_courses(term_id=TERM_ID, section_ids=section_ids)
+                    elapsed.append(time.perf_counter() - start)
+                label = 'Postgres JSON aggregation' if json_aggregation else 'Python assembly'
+                print(f'{label}: {len(feeds[json_aggregation])} courses, best of {args.runs} runs = {min(elapsed):.3f}s')
+            print(f'Feeds are identical: {feeds[False] == feeds[True]}')
+            _compare_intermediates(runs=args.runs)
+            app.config['COURSE_FEED_JSON_AGGREGATION'] = False
+            for after in [None, ['Benchmark course 5', 100005]]:
+                _skip_cached_feeds()
+                # Status bitsets of the new version are built before the clock starts.
+                CourseStatus.get_index(TERM_ID)
+                start = time.perf_counter()
+                api_json = SisSection.get_eligible_courses_not_invited(term_id=TERM_ID, page={'after': after, 'limit': 50})
+                label = 'Later page' if after else 'First page'
+                print(f'{label}: {len(api_json["courses"])} of {api_json["totalCount"]} courses in {time.perf_counter() - start:.3f}s')
+            for stream in [False, True]:
+                _skip_cached_feeds()
+                CourseStatus.get_index(TERM_ID)
+                tracemalloc.start()
+                courses = SisSection.get_eligible_courses_not_invited(term_id=TERM_ID, stream=stream)
+                byte_count = sum(len(json.dumps(course)) for course in courses)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                label = 'Streamed feed' if stream else 'Full feed'
+                print(f'{label}: {byte_count} bytes of JSON, peak memory = {peak / 1024 / 1024:.1f} MiB')
+        finally:
+            db.session.rollback()
+
+
+def _skip_cached_feeds():
+    # Feeds are cached per term version. The new version is rolled back with the rest, whereas TermVersion.bump would
+    # commit.
+    db.session.execute(
+        text("""
+            INSERT INTO term_versions (term_id, version)
+            VALUES (:term_id, nextval('term_versions_seq'))
+            ON CONFLICT (term_id) DO UPDATE SET version = EXCLUDED.version
+        """),
+        {'term_id': TERM_ID},
+    )
+
+
+def _compare_intermediates(runs):
+    rows = db.session.execute(
+        text(f"""
+            SELECT {_COURSE_FEED_COLUMNS}
+            FROM sis_sections s
+            JOIN instructors i ON i.uid = s.instructor_uid
+            JOIN rooms r ON r.location = s.meeting_location
+            WHERE s.term_id = :term_id AND s.instructor_role_code IN ('ICNT', 'PI', 'TNIC')
+            ORDER BY s.course_title, s.section_id, s.instructor_uid
+        """),
+        {'term_id': TERM_ID},
+    ).fetchall()
+    for label, build in [('Plain dicts', _get_course_dicts_per_id), ('Slotted records', _get_course_records_per_id)]:
+        elapsed = []
+        for _ in range(runs):
+            format_time.cache_clear()
+            start = time.perf_counter()
+            build(rows)
+            elapsed.append(time.perf_counter() - start)
+        format_time.cache_clear()
+        tracemalloc.start()
+        intermediates = build(rows)
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f'{label}: {len(intermediates)} sections from {len(rows)} rows, best of {runs} runs = '
+              f'{min(elapsed) * 1000:.0f} ms, retained memory = {retained / 1024 / 1024:.1f} MiB')
+
+
+def _get_course_dicts_per_id(rows):
+    # Per-section intermediates as built before slotted records: camelCase dicts per course and per instructor, with
+    # meeting times formatted by strptime on every row (format_time was not memoized).
+    courses_per_id = {}
+    instructors_per_section_id = {}
+    for row in rows:
+        section_id = int(row['section_id'])
+        if section_id not in courses_per_id:
+            instructors_per_section_id[section_id] = {}
+            courses_per_id[section_id] = {
+                'allowedUnits': row['allowed_units'],
+                'courseName': row['course_name'],
+                'courseTitle': row['course_title'],
+                'instructionFormat': row['instruction_format'],
+                'instructors': [],
+                'isPrimary': row['is_primary'],
+                'label': f"{row['course_name']}, {row['instruction_format']} {row['section_num']}",
+                'meetingDays': format_days(row['meeting_days']),
+                'meetingEndDate': row['meeting_end_date'],
+                'meetingEndTime': format_time.__wrapped__(row['meeting_end_time']),
+                'meetingLocation': row['meeting_location'],
+                'meetingStartDate': row['meeting_start_date'],
+                'meetingStartTime': format_time.__wrapped__(row['meeting_start_time']),
+                'sectionId': section_id,
+                'sectionNum': row['section_num'],
+                'termId': row['term_id'],
+            }
+        instructor_uid = row['instructor_uid']
+        if instructor_uid not in instructors_per_section_id[section_id]:
+            instructors_per_section_id[section_id][instructor_uid] = {
+                'deptCode': row['instructor_dept_code'],
+                'email': row['instructor_email'],
+                'name': row['instructor_name'],
+                'roleCode': row['instructor_role_code'],
+                'uid': instructor_uid,
+            }
+    return courses_per_id
+
+
+def _insert_synthetic_term(section_count):
+    params = {'section_count': section_count, 'term_id': TERM_ID}
+    db.session.execute(
+        text("""
+            INSERT INTO rooms (capability, is_auditorium, location, created_at)
+            SELECT 'screencast', FALSE, 'Benchmark Hall ' || n, now()
+            FROM generate_series(1, 200) n
+            ON CONFLICT DO NOTHING
+        """),
+    )
+    db.session.execute(
+        text("""
+            INSERT INTO instructors (uid, dept_code, email, first_name, last_name, created_at, updated_at)
+            SELECT 'benchmark-' || n, 'BENCH', 'benchmark-' || n || '@berkeley.edu', 'Ada', 'Lovelace ' || n, now(), now()
+            FROM generate_series(1, :section_count) n
+            ON CONFLICT DO NOTHING
+        """),
+        params,
+    )
+    # One or two instructors per section.
+    db.session.execute(
+        text("""
+            INSERT INTO sis_sections (
+                allowed_units, course_name, course_title, instruction_format, instructor_name, instructor_role_code,
+                instructor_uid, is_primary, meeting_days, meeting_end_date, meeting_end_time, meeting_location,
+                meeting_start_date, meeting_start_time, section_id, section_num, term_id, created_at
+            )
+            SELECT '4', 'BENCH ' || n, 'Benchmark course ' || n, 'LEC', 'Ada Lovelace', 'PI',
+                'benchmark-' || (n + k), TRUE, 'MOWEFR', '2020-05-08 00:00:00 UTC', '10:59', 'Benchmark Hall ' || (n % 200 + 1),
+                '2020-01-21 00:00:00 UTC', '10:00', 100000 + n, '001', :term_id, now()
+            FROM generate_series(1, :section_count) n
+            CROSS JOIN generate_series(0, 1) k
+            WHERE k = 0 OR n % 3 = 0
+        """),
+        params,
+    )
+    # Every fifth section is cross-listed with its neighbor.
+    db.session.execute(
+        text("""
+            INSERT INTO cross_listings (term_id, section_id, cross_listed_section_ids, created_at)
+            SELECT :term_id, 100000 + n, ARRAY[100000 + n + 1], now()
+            FROM generate_series(5, :section_count - 1, 5) n
+        """),
+        params,
+    )
+    # Every other section is invited; every tenth is scheduled.
+    db.session.execute(
+        text("""
+            INSERT INTO sent_emails (recipient_uids, section_id, template_type, term_id, sent_at)
+            SELECT ARRAY['benchmark-' || n], 100000 + n, 'invitation', :term_id, now()
+            FROM generate_series(2, :section_count, 2) n
+        """),
+        params,
+    )
+    db.session.execute(
+        text("""
+            INSERT INTO scheduled (
+                section_id, term_id, cross_listed_section_ids, instructor_uids, meeting_days, meeting_end_time,
+                meeting_start_time, publish_type, recording_type, room_id, created_at
+            )
+            SELECT 100000 + n, :term_id, '{}', ARRAY['benchmark-' || n], 'MOWEFR', '10:59', '10:00',
+                'kaltura_media_gallery', 'presentation_audio', r.id, now()
+            FROM generate_series(10, :section_count, 10) n
+            JOIN rooms r ON r.location = 'Benchmark Hall ' || (n % 200 + 1)
+        """),
+        params,
+    )
+    # Every fourth section is approved by its first instructor. Approvals are one minute apart, so that their order is
+    # the same in both modes of assembly.
+    db.session.execute(
+        text("""
+            INSERT INTO approvals (
+                approved_by_uid, section_id, term_id, approver_type, cross_listed_section_ids, publish_type,
+                recording_type, room_id, created_at
+            )
+            SELECT 'benchmark-' || n, 100000 + n, :term_id, 'instructor', '{}', 'kaltura_media_gallery',
+                'presentation_audio', r.id, now() - n * interval '1 minute'
+            FROM generate_series(4, :section_count, 4) n
+            JOIN rooms r ON r.location = 'Benchmark Hall ' || (n % 200 + 1)
+        """),
+        params,
+    )
+    # Course filters read course_status. Flags as per CourseStatus.refresh, which would commit.
+    db.session.execute(
+        text("""
+            INSERT INTO course_status (
+                term_id, section_id, has_approvals, has_opted_out, is_invited, is_scheduled, updated_at
+            )
+            SELECT
+                :term_id,
+                s.section_id,
+                EXISTS (SELECT FROM approvals WHERE section_id = s.section_id AND term_id = :term_id),
+                FALSE,
+                EXISTS (SELECT FROM sent_emails WHERE section_id = s.section_id AND term_id = :term_id),
+                EXISTS (SELECT FROM scheduled WHERE section_id = s.section_id AND term_id = :term_id),
+                now()
+            FROM (SELECT DISTINCT section_id FROM sis_sections WHERE term_id = :term_id) s
+        """),
+        params,
+    )
+    # Planner statistics must account for the synthetic term, as autovacuum would after a real SIS refresh.
+    for table in ['approvals', 'course_status', 'cross_listings', 'instructors', 'rooms', 'scheduled', 'sent_emails', 'sis_sections']:
+        db.session.execute(text(f'ANALYZE {table}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -45,6 +45,7 @@ ALTER TABLE IF EXISTS public.admin_users ALTER COLUMN id DROP DEFAULT;
 ALTER TABLE IF EXISTS ONLY public.approvals DROP CONSTRAINT IF EXISTS approvals_pkey;
 ALTER TABLE IF EXISTS ONLY public.canvas_course_sites DROP CONSTRAINT IF EXISTS canvas_course_sites_pkey;
 ALTER TABLE IF EXISTS ONLY public.course_preferences DROP CONSTRAINT IF EXISTS course_preferences_pkey;
+ALTER TABLE IF EXISTS ONLY public.course_status DROP CONSTRAINT IF EXISTS course_status_pkey;
 ALTER TABLE IF EXISTS ONLY public.cross_listings DROP CONSTRAINT IF EXISTS cross_listings_pkey;
 ALTER TABLE IF EXISTS ONLY public.email_templates DROP CONSTRAINT IF EXISTS email_templates_name_unique_constraint;
 ALTER TABLE IF EXISTS ONLY public.email_templates DROP CONSTRAINT IF EXISTS email_templates_pkey;
@@ -56,6 +57,7 @@ ALTER TABLE IF EXISTS ONLY public.rooms DROP CONSTRAINT IF EXISTS rooms_pkey;
 ALTER TABLE IF EXISTS ONLY public.scheduled DROP CONSTRAINT IF EXISTS scheduled_pkey;
 ALTER TABLE IF EXISTS ONLY public.sent_emails DROP CONSTRAINT IF EXISTS sent_emails_pkey;
 ALTER TABLE IF EXISTS ONLY public.sis_sections DROP CONSTRAINT IF EXISTS sis_sections_pkey;
+ALTER TABLE IF EXISTS ONLY public.term_versions DROP CONSTRAINT IF EXISTS term_versions_pkey;
 
 --
 
@@ -72,6 +74,7 @@ DROP SEQUENCE IF EXISTS public.admin_users_id_seq;
 DROP TABLE IF EXISTS public.approvals;
 DROP TABLE IF EXISTS public.canvas_course_sites;
 DROP TABLE IF EXISTS public.course_preferences;
+DROP TABLE IF EXISTS public.course_status;
 DROP TABLE IF EXISTS public.cross_listings;
 DROP TABLE IF EXISTS public.email_templates;
 DROP SEQUENCE IF EXISTS public.email_templates_id_seq;
@@ -87,6 +90,8 @@ DROP TABLE IF EXISTS public.sent_emails;
 DROP SEQUENCE IF EXISTS public.sent_emails_id_seq;
 DROP TABLE IF EXISTS public.sis_sections;
 DROP SEQUENCE IF EXISTS public.sis_sections_id_seq;
+DROP TABLE IF EXISTS public.term_versions;
+DROP SEQUENCE IF EXISTS public.term_versions_seq;
 
 --
 
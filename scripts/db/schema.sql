@@ -82,6 +82,9 @@ CREATE TYPE room_capability_types AS ENUM (
 CREATE TABLE admin_users (
     id integer NOT NULL,
     uid character varying(255) NOT NULL,
+    email character varying(255),
+    first_name character varying(255),
+    last_name character varying(255),
     created_at timestamp with time zone NOT NULL,
     updated_at timestamp with time zone NOT NULL,
     deleted_at timestamp with time zone
@@ -142,6 +145,20 @@ ALTER TABLE course_preferences ADD CONSTRAINT course_preferences_pkey PRIMARY KE
 
 --
 
+CREATE TABLE course_status (
+    term_id INTEGER NOT NULL,
+    section_id INTEGER NOT NULL,
+    has_approvals BOOLEAN NOT NULL,
+    has_opted_out BOOLEAN NOT NULL,
+    is_invited BOOLEAN NOT NULL,
+    is_scheduled BOOLEAN NOT NULL,
+    updated_at timestamp with time zone NOT NULL
+);
+ALTER TABLE course_status OWNER TO diablo;
+ALTER TABLE course_status ADD CONSTRAINT course_status_pkey PRIMARY KEY (term_id, section_id);
+
+--
+
 CREATE TABLE cross_listings (
     term_id INTEGER NOT NULL,
     section_id INTEGER NOT NULL,
@@ -349,6 +366,22 @@ CREATE INDEX sis_sections_term_id_section_id_idx ON sis_sections(term_id, sectio
 
 --
 
+CREATE TABLE term_versions (
+    term_id INTEGER NOT NULL,
+    version BIGINT NOT NULL
+);
+ALTER TABLE term_versions OWNER TO diablo;
+ALTER TABLE term_versions ADD CONSTRAINT term_versions_pkey PRIMARY KEY (term_id);
+CREATE SEQUENCE term_versions_seq
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+ALTER TABLE term_versions_seq OWNER TO diablo;
+
+--
+
 ALTER TABLE ONLY approvals
     ADD CONSTRAINT approvals_room_id_fkey FOREIGN KEY (room_id) REFERENCES rooms(id);
 ALTER TABLE ONLY scheduled
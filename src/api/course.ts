@@ -20,9 +20,11 @@ export function getApprovals(termId: number, sectionId: number) {
 }
 
 export function getCourses(filter, termId) {
-  return axios.post(`${utils.apiBaseUrl()}/api/courses`, {
-    filter,
-    termId
+  return axios.get(`${utils.apiBaseUrl()}/api/courses`, {
+    params: {
+      filter,
+      termId
+    }
   })
 }
 
@@ -24,17 +24,23 @@ ENHANCEMENTS, OR MODIFICATIONS.
 """
 import json
 
-from diablo import std_commit
+from diablo import cache, std_commit
+from diablo.lib.util import encode_cursor
+from diablo.merged import calnet
 from diablo.models.approval import Approval
 from diablo.models.course_preference import CoursePreference
+from diablo.models.course_status import CourseStatus
+from diablo.models.cross_listing import CrossListing
 from diablo.models.room import Room
 from diablo.models.scheduled import Scheduled
 from diablo.models.sent_email import SentEmail
 from diablo.models.sis_section import SisSection
+from diablo.models.term_version import TermVersion
 from flask import current_app as app
 import pytest
+from sqlalchemy import text
 from tests.test_api.api_test_utils import api_approve, api_get_course
-from tests.util import test_approvals_workflow
+from tests.util import count_queries, override_config, test_approvals_workflow
 
 admin_uid = '2040'
 deleted_admin_user_uid = '1022796'
@@ -218,6 +224,32 @@ class TestGetCourse:
             expected_status_code=404,
         )
 
+    def test_etag(self, client, db, admin_session):
+        """Course is not re-sent when the client's copy is current."""
+        with test_approvals_workflow(app):
+            path = f'/api/course/{self.term_id}/{section_4_id}'
+            response = client.get(path)
+            assert response.status_code == 200
+            etag = response.headers['ETag']
+            with count_queries() as statements:
+                response = client.get(path, headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert response.headers['ETag'] == etag
+            assert not response.data
+            # Course feed is not assembled.
+            assert not [s for s in statements if 'sis_sections' in s]
+
+            SentEmail.create(
+                section_id=section_4_id,
+                recipient_uids=_get_instructor_uids(section_id=section_4_id, term_id=self.term_id),
+                template_type='invitation',
+                term_id=self.term_id,
+            )
+            response = client.get(path, headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etag
+            assert response.json['status'] == 'Invited'
+
     def test_course_with_partial_approval(self, client, db, admin_session):
         """Course with two instructors and one approval."""
         with test_approvals_workflow(app):
@@ -326,12 +358,13 @@ class TestCoursesFilter:
         return app.config['CURRENT_TERM_ID']
 
     @staticmethod
-    def _api_courses(client, term_id, filter_=None, expected_status_code=200):
+    def _api_courses(client, term_id, filter_=None, page=None, expected_status_code=200):
         response = client.post(
             '/api/courses',
             data=json.dumps({
                 'termId': term_id,
                 'filter': filter_ or 'Not Invited',
+                **(page or {}),
             }),
             content_type='application/json',
         )
@@ -512,6 +545,298 @@ class TestCoursesFilter:
             assert course
             assert course['label'] == 'LAW 23, LEC 002'
 
+    def test_query_count_independent_of_feed_size(self, db):
+        """The number of queries needed to build the course feed does not grow with the number of sections."""
+        sql = 'SELECT DISTINCT section_id FROM sis_sections WHERE term_id = :term_id'
+        all_section_ids = [row['section_id'] for row in db.session.execute(text(sql), {'term_id': self.term_id})]
+        # Skip cached feeds.
+        TermVersion.bump(term_id=self.term_id)
+        TermVersion.flush_bumps()
+        with count_queries() as statements:
+            # This section is cross-listed.
+            assert len(SisSection.get_courses(term_id=self.term_id, section_ids=[28475])) == 1
+        query_count = len(statements)
+        with count_queries() as statements:
+            assert len(SisSection.get_courses(term_id=self.term_id, section_ids=all_section_ids)) > 5
+        assert len(statements) == query_count
+
+    def test_json_aggregation_mode(self, db):
+        """Course feed assembled by Postgres is identical to the feed assembled by Python."""
+        with test_approvals_workflow(app):
+            for section_id in [section_1_id, section_6_id, 28475]:
+                instructor_uids = _get_instructor_uids(section_id=section_id, term_id=self.term_id)
+                SentEmail.create(
+                    section_id=section_id,
+                    # Invitees keep the order of recipients in both modes.
+                    recipient_uids=sorted(instructor_uids + ['1'], reverse=True),
+                    template_type='invitation',
+                    term_id=self.term_id,
+                )
+                Approval.create(
+                    approved_by_uid=instructor_uids[0],
+                    approver_type_='instructor',
+                    cross_listed_section_ids=[],
+                    publish_type_='canvas',
+                    recording_type_='presentation_audio',
+                    room_id=Room.get_room_id(section_id=section_id, term_id=self.term_id),
+                    section_id=section_id,
+                    term_id=self.term_id,
+                )
+            _schedule_recordings(section_id=section_1_id, term_id=self.term_id)
+            CoursePreference.update_opt_out(section_id=section_3_id, term_id=self.term_id, opt_out=True)
+            std_commit(allow_test_environment=True)
+
+            sql = 'SELECT DISTINCT section_id FROM sis_sections WHERE term_id = :term_id'
+            section_ids = [row['section_id'] for row in db.session.execute(text(sql), {'term_id': self.term_id})]
+            expected = SisSection.get_courses(term_id=self.term_id, section_ids=section_ids)
+            with override_config(app, 'COURSE_FEED_JSON_AGGREGATION', True):
+                with count_queries() as statements:
+                    actual = SisSection.get_courses(term_id=self.term_id, section_ids=section_ids)
+                # Term version, course feed, rooms and approver profiles
+                assert len(statements) == 4
+            assert json.loads(json.dumps(actual)) == json.loads(json.dumps(expected))
+
+    def test_approver_profiles(self, db, monkeypatch):
+        """Approvers are found in local tables; CalNet is searched once, at most, for those unknown locally."""
+        with test_approvals_workflow(app):
+            approver_uids = [_get_instructor_uids(section_id=s, term_id=self.term_id)[0] for s in [section_1_id, section_6_id]]
+            known_uid, unknown_uid = approver_uids
+            db.session.execute(
+                text("UPDATE instructors SET first_name = 'Ada', last_name = 'Lovelace' WHERE uid = :uid"),
+                {'uid': known_uid},
+            )
+            for section_id, approver_uid in zip([section_1_id, section_6_id], approver_uids):
+                Approval.create(
+                    approved_by_uid=approver_uid,
+                    approver_type_='instructor',
+                    cross_listed_section_ids=[],
+                    publish_type_='canvas',
+                    recording_type_='presentation_audio',
+                    room_id=Room.get_room_id(section_id=section_id, term_id=self.term_id),
+                    section_id=section_id,
+                    term_id=self.term_id,
+                )
+            std_commit(allow_test_environment=True)
+
+            searches = []
+            search_calnet_users = calnet._search_calnet_users
+            monkeypatch.setattr(calnet, '_search_calnet_users', lambda *args: searches.append(args[2]) or search_calnet_users(*args))
+            # CalNet fixtures are loaded into the cache. Restore them when done.
+            cache_keys = [f'calnet/user_for_uid_{uid}' for uid in approver_uids]
+            cached_calnet_users = dict(zip(cache_keys, cache.get_many(*cache_keys)))
+            try:
+                for json_aggregation in [False, True]:
+                    with override_config(app, 'COURSE_FEED_JSON_AGGREGATION', json_aggregation):
+                        for cache_key in cache_keys:
+                            cache.delete(cache_key)
+                        courses = SisSection.get_courses(term_id=self.term_id, section_ids=[section_1_id, section_6_id])
+                        approvers = dict((a['approvedBy']['uid'], a['approvedBy']) for c in courses for a in c['approvals'])
+                        assert sorted(approvers.keys()) == sorted(approver_uids)
+                        assert approvers[known_uid]['name'] == 'Ada Lovelace'
+                assert searches == [[unknown_uid], [unknown_uid]]
+                # Cached CalNet profiles are reused.
+                TermVersion.bump(term_id=self.term_id)
+                SisSection.get_courses(term_id=self.term_id, section_ids=[section_1_id, section_6_id])
+                assert len(searches) == 2
+            finally:
+                cache.set_many(cached_calnet_users)
+
+    def test_course_status_maintained_on_write(self, db):
+        """Writes to approvals, scheduled, sent_emails and course_preferences keep course_status current."""
+        def _course_status():
+            sql = 'SELECT section_id, has_approvals, has_opted_out, is_invited, is_scheduled FROM course_status WHERE term_id = :term_id'
+            return dict((row['section_id'], tuple(row)[1:]) for row in db.session.execute(text(sql), {'term_id': self.term_id}))
+
+        with test_approvals_workflow(app):
+            instructor_uids = _get_instructor_uids(section_id=section_1_id, term_id=self.term_id)
+            SentEmail.create(
+                section_id=section_1_id,
+                recipient_uids=instructor_uids,
+                template_type='invitation',
+                term_id=self.term_id,
+            )
+            Approval.create(
+                approved_by_uid=instructor_uids[0],
+                approver_type_='instructor',
+                cross_listed_section_ids=[],
+                publish_type_='canvas',
+                recording_type_='presentation_audio',
+                room_id=Room.get_room_id(section_id=section_1_id, term_id=self.term_id),
+                section_id=section_1_id,
+                term_id=self.term_id,
+            )
+            _schedule_recordings(section_id=section_1_id, term_id=self.term_id)
+            # This section is cross-listed.
+            CoursePreference.update_opt_out(section_id=28475, term_id=self.term_id, opt_out=True)
+            std_commit(allow_test_environment=True)
+
+            course_status = _course_status()
+            assert course_status[section_1_id] == (True, False, True, True)
+            cross_listed_section_ids = CrossListing.get_cross_listed_sections(section_id=28475, term_id=self.term_id)
+            for section_id in [28475] + cross_listed_section_ids:
+                assert course_status[section_id] == (False, True, False, False)
+            # Incremental updates match a full rebuild.
+            CourseStatus.refresh(term_id=self.term_id)
+            assert _course_status() == course_status
+
+    def test_course_status_maintained_on_sis_refresh(self, db):
+        """New sections from SIS show up in course filters without waiting for a write to approvals and such."""
+        new_section_id = 99999
+        with test_approvals_workflow(app):
+            with open(f"{app.config['BASE_DIR']}/fixtures/sis/courses.json", 'r') as file:
+                sis_sections = json.loads(file.read())
+            template = next(row for row in sis_sections if int(row['section_id']) == section_1_id)
+            sis_sections.append({**template, 'section_id': new_section_id})
+            SisSection.refresh(sis_sections=sis_sections, term_id=self.term_id)
+            std_commit(allow_test_environment=True)
+            courses = SisSection.get_eligible_courses_not_invited(term_id=self.term_id)
+            assert new_section_id in [course['sectionId'] for course in courses]
+
+    def test_filter_counts(self, client, db, admin_session):
+        """Counts per filter, derived from in-memory bitsets, agree with the filter feeds."""
+        with test_approvals_workflow(app):
+            index = CourseStatus.get_index(self.term_id)
+            for section_id in [section_1_id, section_4_id, section_6_id]:
+                instructor_uids = _get_instructor_uids(section_id=section_id, term_id=self.term_id)
+                SentEmail.create(
+                    section_id=section_id,
+                    recipient_uids=instructor_uids,
+                    template_type='invitation',
+                    term_id=self.term_id,
+                )
+                if section_id != section_4_id:
+                    Approval.create(
+                        approved_by_uid=instructor_uids[0],
+                        approver_type_='instructor',
+                        cross_listed_section_ids=[],
+                        publish_type_='canvas',
+                        recording_type_='presentation_audio',
+                        room_id=Room.get_room_id(section_id=section_id, term_id=self.term_id),
+                        section_id=section_id,
+                        term_id=self.term_id,
+                    )
+            _schedule_recordings(section_id=section_1_id, term_id=self.term_id)
+            CoursePreference.update_opt_out(section_id=section_3_id, term_id=self.term_id, opt_out=True)
+            std_commit(allow_test_environment=True)
+
+            # Writes bump the term version, so a stale index is rebuilt.
+            assert CourseStatus.get_index(self.term_id).version > index.version
+            index = CourseStatus.get_index(self.term_id)
+            assert CourseStatus.get_index(self.term_id) is index
+
+            response = client.get(f'/api/courses/counts/{self.term_id}')
+            assert response.status_code == 200
+            counts = response.json
+            assert set(counts.keys()) == {'Do Not Email', 'Invited', 'Not Invited', 'Partially Approved', 'Scheduled'}
+            for filter_, count in counts.items():
+                courses = self._api_courses(client, term_id=self.term_id, filter_=filter_)
+                assert count == len(courses)
+                assert sorted(index.get_section_ids(filter_)) == sorted(c['sectionId'] for c in courses)
+            assert counts['Invited'] and counts['Partially Approved'] and counts['Scheduled']
+            assert client.get('/api/courses/counts/foo').status_code == 404
+
+    def test_etag(self, client, db, admin_session):
+        """Repeat poll of the term feed, with the ETag of the previous response, gets '304 Not Modified'."""
+        with test_approvals_workflow(app):
+            path = f'/api/courses?termId={self.term_id}&filter=Invited'
+            response = client.get(path)
+            assert response.status_code == 200
+            assert section_4_id not in [c['sectionId'] for c in response.json]
+            etag = response.headers['ETag']
+            with count_queries() as statements:
+                response = client.get(path, headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert not response.data
+            # Course feed is not assembled.
+            assert not [s for s in statements if 'sis_sections' in s]
+
+            SentEmail.create(
+                section_id=section_4_id,
+                recipient_uids=_get_instructor_uids(section_id=section_4_id, term_id=self.term_id),
+                template_type='invitation',
+                term_id=self.term_id,
+            )
+            response = client.get(path, headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etag
+            assert section_4_id in [c['sectionId'] for c in response.json]
+            assert client.get('/api/courses?termId=foo&filter=Invited').status_code == 400
+
+    def test_feed_cache(self, db):
+        """Cached course feed is served until a write bumps the term version."""
+        with test_approvals_workflow(app):
+            course = SisSection.get_course(term_id=self.term_id, section_id=section_4_id)
+            assert course['status'] == 'Not Invited'
+            with count_queries() as statements:
+                assert SisSection.get_course(term_id=self.term_id, section_id=section_4_id) == course
+            # Term version only
+            assert len(statements) == 1
+
+            SentEmail.create(
+                section_id=section_4_id,
+                recipient_uids=_get_instructor_uids(section_id=section_4_id, term_id=self.term_id),
+                template_type='invitation',
+                term_id=self.term_id,
+            )
+            assert SisSection.get_course(term_id=self.term_id, section_id=section_4_id)['status'] == 'Invited'
+
+    def test_pagination(self, client, admin_session):
+        """Keyset pagination walks the feed in order, one page at a time."""
+        all_courses = self._api_courses(client, term_id=self.term_id)
+        assert len(all_courses) > 3
+        for json_aggregation in [False, True]:
+            with override_config(app, 'COURSE_FEED_JSON_AGGREGATION', json_aggregation):
+                courses = []
+                page = {'limit': 3}
+                while True:
+                    with count_queries() as statements:
+                        api_json = self._api_courses(client, term_id=self.term_id, page=page)
+                    # Total count is per the status bitsets, not a count query.
+                    assert not [s for s in statements if 'COUNT(' in s.upper()]
+                    assert api_json['totalCount'] == len(all_courses)
+                    assert len(api_json['courses']) <= 3
+                    courses.extend(api_json['courses'])
+                    if not api_json['nextCursor']:
+                        break
+                    page = {'cursor': api_json['nextCursor'], 'limit': 3}
+                assert [c['sectionId'] for c in courses] == [c['sectionId'] for c in all_courses]
+
+    def test_streaming(self, client, admin_session):
+        """Unpaginated feed is streamed, batch by batch, with same content as the non-streamed feed."""
+        expected = self._api_courses(client, term_id=self.term_id)
+        assert len(expected) > 2
+        for json_aggregation in [False, True]:
+            with override_config(app, 'COURSE_FEED_JSON_AGGREGATION', json_aggregation):
+                with override_config(app, 'COURSE_FEED_STREAMING', True):
+                    with override_config(app, 'COURSE_FEED_STREAM_BATCH_SIZE', 2):
+                        with count_queries() as statements:
+                            response = client.post(
+                                '/api/courses',
+                                data=json.dumps({'termId': self.term_id, 'filter': 'Not Invited'}),
+                                content_type='application/json',
+                            )
+                            assert response.status_code == 200
+                            assert response.is_streamed
+                            assert response.json == expected
+                        # One feed query, whatever the number of batches.
+                        assert len([s for s in statements if 'r.location AS room_location' in s]) == 1
+
+    def test_invalid_pagination(self, client, admin_session):
+        """Malformed cursor or limit is a bad request."""
+        self._api_courses(client, term_id=self.term_id, page={'cursor': 'foo'}, expected_status_code=400)
+        self._api_courses(client, term_id=self.term_id, page={'limit': 0}, expected_status_code=400)
+        for after in [['Course title'], [28602, 'Course title'], ['Course title', '28602'], [None, True]]:
+            self._api_courses(client, term_id=self.term_id, page={'cursor': encode_cursor(after)}, expected_status_code=400)
+
+    def test_full_last_page(self, client, admin_session):
+        """A last page that is full has no next cursor."""
+        all_courses = self._api_courses(client, term_id=self.term_id)
+        for json_aggregation in [False, True]:
+            with override_config(app, 'COURSE_FEED_JSON_AGGREGATION', json_aggregation):
+                api_json = self._api_courses(client, term_id=self.term_id, page={'limit': len(all_courses)})
+                assert len(api_json['courses']) == len(all_courses)
+                assert api_json['nextCursor'] is None
+
     def test_scheduled_filter(self, client, db, admin_session):
         """Scheduled filter: Courses with recordings scheduled."""
         with test_approvals_workflow(app):
@@ -559,8 +884,8 @@ class TestCoursesChanges:
         return app.config['CURRENT_TERM_ID']
 
     @staticmethod
-    def _api_course_changes(client, term_id, expected_status_code=200):
-        response = client.get(f'/api/courses/changes/{term_id}')
+    def _api_course_changes(client, term_id, page=None, expected_status_code=200):
+        response = client.get(f'/api/courses/changes/{term_id}', query_string=page)
         assert response.status_code == expected_status_code
         return response.json
 
@@ -599,6 +924,22 @@ class TestCoursesChanges:
         assert course['scheduled']['hasObsoleteMeetingTimes'] is False
         assert course['scheduled']['hasObsoleteInstructors'] is False
 
+    def test_pagination(self, client, admin_session):
+        """Course changes are paginated with the same cursor as other course feeds."""
+        with test_approvals_workflow(app):
+            obsolete_room = Room.find_room('Barker 101')
+            for section_id in [section_2_id, section_3_id]:
+                _schedule_recordings(section_id=section_id, term_id=self.term_id, room_id=obsolete_room.id)
+            all_courses = self._api_course_changes(client, term_id=self.term_id)
+            assert len(all_courses) > 1
+
+            api_json = self._api_course_changes(client, term_id=self.term_id, page={'limit': 1})
+            assert api_json['totalCount'] == len(all_courses)
+            assert api_json['courses'] == all_courses[:1]
+            api_json = self._api_course_changes(client, term_id=self.term_id, page={'cursor': api_json['nextCursor']})
+            assert api_json['courses'] == all_courses[1:]
+            assert api_json['nextCursor'] is None
+
     def test_has_obsolete_meeting_times(self, client, admin_session):
         """Admins can see meeting time changes that might disrupt scheduled recordings."""
         with test_approvals_workflow(app):
@@ -22,6 +22,9 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 "AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
 ENHANCEMENTS, OR MODIFICATIONS.
 """
+from diablo.lib.cache_stats import reset_cache_stats
+from diablo.merged.calnet import get_calnet_user_for_uid
+from flask import current_app as app
 import pytest
 
 admin_uid = '2040'
@@ -128,3 +131,34 @@ class TestJobsAvailable:
         for available_job in available_jobs:
             assert available_job['key']
             assert len(available_job['description'])
+
+
+class TestCacheStats:
+
+    @staticmethod
+    def _api_cache_stats(client, expected_status_code=200):
+        response = client.get('/api/cache/stats')
+        assert response.status_code == expected_status_code
+        return response.json
+
+    def test_anonymous(self, client):
+        """Denies anonymous access."""
+        self._api_cache_stats(client, expected_status_code=401)
+
+    def test_unauthorized(self, client, instructor_session):
+        """Denies access if user is not an admin."""
+        self._api_cache_stats(client, expected_status_code=401)
+
+    def test_authorized(self, client, admin_session):
+        """Admin can access counters and latencies per key pattern."""
+        reset_cache_stats()
+        get_calnet_user_for_uid(app, admin_uid)
+        get_calnet_user_for_uid(app, admin_uid)
+        stats = self._api_cache_stats(client)
+        assert stats['pid']
+        assert stats['since']
+        calnet_stats = stats['keyPatterns']['calnet/user_for_uid_{uid}']
+        assert calnet_stats['hits'] + calnet_stats['misses'] == 2
+        assert calnet_stats['hitRatio'] >= 0.5
+        assert calnet_stats['getMs']['count'] == 2
+        assert sum(calnet_stats['getMs']['buckets'].values()) == 2
@@ -97,6 +97,21 @@ class TestGetRoom:
         assert api_json['kalturaResourceId'] == 890
         assert len(api_json['recordingTypeOptions']) == 1
 
+    def test_etag(self, client, admin_session):
+        """Room feed is not re-sent when the client's copy is current."""
+        room = Room.find_room('Barrows 106')
+        response = client.get(f'/api/room/{room.id}')
+        etag = response.headers['ETag']
+        response = client.get(f'/api/room/{room.id}', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert client.get(f'/api/room/{room.id}', headers={'If-None-Match': '"foo"'}).status_code == 200
+
+        # Room updates change the ETag.
+        Room.set_auditorium(room.id, False)
+        response = client.get(f'/api/room/{room.id}', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
     def test_get_auditorium(self, client, admin_session):
         """Admin user has access to auditorium metadata."""
         location = 'Li Ka Shing 145'
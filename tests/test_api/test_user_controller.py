@@ -22,7 +22,16 @@ SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
 "AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
 ENHANCEMENTS, OR MODIFICATIONS.
 """
+from diablo import std_commit
+from diablo.models.admin_user import _reset_roster, AdminUser
+from diablo.models.approval import Approval
+from diablo.models.course_status import CourseStatus
+from diablo.models.sis_section import SisSection
+from diablo.models.term_version import TermVersion
+from diablo.models.user import User
 import pytest
+from sqlalchemy import text
+from tests.util import count_queries, test_approvals_workflow
 
 admin_uid = '2040'
 instructor_not_teaching_uid = '1015674'
@@ -81,6 +90,48 @@ class TestMyProfile:
         assert [i['uid'] for i in sections[1]['instructors']] == ['234567', '8765432']
 
 
+class TestAdminRoster:
+
+    def test_roster_in_memory(self, app, db):
+        """Admin checks are answered from memory."""
+        assert AdminUser.is_admin(admin_uid)
+        with count_queries() as statements:
+            assert AdminUser.is_admin(admin_uid) is True
+            assert AdminUser.is_admin(instructor_uid) is False
+            assert admin_uid in AdminUser.get_admin_uids()
+        assert not statements
+
+    def test_roster_refreshed_on_change(self, app, db):
+        """Roster is reloaded when admin users are created or deleted."""
+        uid = '9876543'
+        assert AdminUser.is_admin(uid) is False
+        AdminUser.create(uid)
+        assert AdminUser.is_admin(uid) is True
+        AdminUser.delete(uid)
+        assert AdminUser.is_admin(uid) is False
+        assert uid in AdminUser.get_admin_uids(include_deleted=True)
+        assert uid not in AdminUser.get_admin_uids()
+
+    def test_admin_status_not_cached_with_profile(self, app, db):
+        """Admin rights granted, or revoked by raw SQL, apply as soon as the roster is reloaded."""
+        uid = instructor_not_teaching_uid
+        user = User(uid)
+        assert not user.is_admin
+        assert not user.is_active
+        AdminUser.create(uid)
+        user = User(uid)
+        assert user.is_admin
+        assert user.to_api_json()['isAdmin'] is True
+        assert user.to_api_json()['isAuthenticated'] is True
+        db.session.execute(text('UPDATE admin_users SET deleted_at = now() WHERE uid = :uid'), {'uid': uid})
+        # Per ADMIN_USERS_CACHE_TIMEOUT, the roster is reloaded within a minute.
+        _reset_roster()
+        user = User(uid)
+        assert not user.is_admin
+        assert not user.is_active
+        assert user.to_api_json()['isAdmin'] is False
+
+
 class TestUserProfile:
     """Admin user see all user profiles."""
 
@@ -125,3 +176,99 @@ class TestUserProfile:
         user = self._api_user(client, uid)
         assert find_course(28602)
         assert not find_course(22460)
+
+    def test_query_count_of_instructor_courses(self, app, db):
+        """Courses of instructor, rooms included, cost no more queries than the feed of a single section."""
+        term_id = app.config['CURRENT_TERM_ID']
+        # Skip cached feeds.
+        TermVersion.bump(term_id=term_id)
+        with count_queries() as statements:
+            SisSection.get_courses(term_id=term_id, section_ids=[28165])
+        query_count = len(statements)
+        TermVersion.bump(term_id=term_id)
+        with count_queries() as statements:
+            courses = SisSection.get_courses_per_instructor_uid(term_id=term_id, instructor_uid=instructor_uid)
+        assert len(courses) > 1
+        assert len(statements) == query_count
+        user = User(instructor_uid)
+        with count_queries() as statements:
+            api_json = user.to_api_json()
+        assert [c['sectionId'] for c in api_json['courses']] == [c['sectionId'] for c in courses]
+        assert all(c['room'] for c in api_json['courses'])
+        # Term version; the feed itself is a cache hit.
+        assert len(statements) == 1
+
+    def test_lazy_principal(self, app, db):
+        """Authentication does not build the course feed of the user."""
+        User.invalidate_cached_profile(instructor_uid)
+        # Load the admin roster.
+        AdminUser.is_admin(admin_uid)
+        with count_queries() as statements:
+            user = User(instructor_uid)
+            assert user.is_active is True
+            assert user.is_admin is False
+        # Whether user teaches this term. The admin roster is in memory.
+        assert len(statements) == 1
+        api_json = user.to_api_json()
+        assert api_json['isTeaching'] is True
+        assert len(api_json['courses']) > 1
+        # The feed is built once.
+        assert user.to_api_json() is api_json
+
+    def test_cached_profile(self, app, db):
+        """Profile is cached until an approval, opt-out or schedule touches a section of the instructor."""
+        term_id = app.config['CURRENT_TERM_ID']
+        with test_approvals_workflow(app):
+            for uid in [instructor_uid, '234567']:
+                User(uid).to_api_json()
+            with count_queries() as statements:
+                api_json = User(instructor_uid).to_api_json()
+            assert not statements
+            course = next(c for c in api_json['courses'] if c['sectionId'] == 28602)
+            assert course['approvals'] == []
+
+            Approval.create(
+                approved_by_uid=instructor_uid,
+                approver_type_='instructor',
+                cross_listed_section_ids=[],
+                publish_type_='canvas',
+                recording_type_='presentation_audio',
+                room_id=course['room']['id'],
+                section_id=28602,
+                term_id=term_id,
+            )
+            std_commit(allow_test_environment=True)
+            api_json = User(instructor_uid).to_api_json()
+            course = next(c for c in api_json['courses'] if c['sectionId'] == 28602)
+            assert len(course['approvals']) == 1
+            # Co-instructor of the section
+            course = next(c for c in User('234567').to_api_json()['courses'] if c['sectionId'] == 28602)
+            assert len(course['approvals']) == 1
+
+    def test_deferred_term_version_bump(self, app, db):
+        """A run of writes makes one bump, which invalidates profiles of the affected instructors only."""
+        term_id = app.config['CURRENT_TERM_ID']
+        section_uids = SisSection.get_instructor_uids(term_id=term_id, section_id=28602)
+        other_uid = next(
+            uid for uid in SisSection.get_distinct_instructor_uids()
+            if uid not in section_uids and SisSection.is_teaching(term_id=term_id, instructor_uid=uid)
+        )
+        with test_approvals_workflow(app):
+            for uid in [instructor_uid, other_uid]:
+                User(uid).to_api_json()
+            version = TermVersion.get_version(term_id)
+            with count_queries() as statements:
+                for _ in range(3):
+                    CourseStatus.refresh(term_id=term_id, section_ids=[28602])
+            assert not [s for s in statements if 'term_versions' in s]
+
+            with count_queries() as statements:
+                TermVersion.flush_bumps()
+            assert len([s for s in statements if 'INSERT INTO term_versions' in s]) == 1
+            assert TermVersion.get_version(term_id) > version
+            with count_queries() as statements:
+                User(other_uid).to_api_json()
+            assert not statements
+            with count_queries() as statements:
+                User(instructor_uid).to_api_json()
+            assert statements
@@ -0,0 +1,49 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+from diablo.jobs.util import insert_or_update_instructors
+from diablo.models.instructor import Instructor
+from sqlalchemy import text
+
+new_instructor_uid = '234567'
+stale_instructor_uid = '8765432'
+
+
+class TestInstructorSync:
+
+    def test_sync_new_and_stale_only(self, db):
+        """Only instructors new to the table, or not updated within max age, are synced."""
+        assert Instructor.get_uids_to_sync(max_age_days=7) == ([], [])
+
+        db.session.execute(text('DELETE FROM instructors WHERE uid = :uid'), {'uid': new_instructor_uid})
+        db.session.execute(
+            text("UPDATE instructors SET updated_at = now() - INTERVAL '30 days' WHERE uid = :uid"),
+            {'uid': stale_instructor_uid},
+        )
+        assert Instructor.get_uids_to_sync(max_age_days=7) == ([new_instructor_uid], [stale_instructor_uid])
+        assert Instructor.get_uids_to_sync(max_age_days=60) == ([new_instructor_uid], [])
+
+        # Upsert of existing instructors refreshes 'updated_at'.
+        insert_or_update_instructors([new_instructor_uid, stale_instructor_uid])
+        assert Instructor.get_uids_to_sync(max_age_days=7) == ([], [])
@@ -0,0 +1,116 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+import time
+
+from diablo import cache, cachify, cachify_many
+from tests.util import override_config
+
+upstream_calls = []
+
+
+@cachify('test_cachify/get_resource_list_{resource_type}', timeout=30)
+def _get_resource_list(resource_type):
+    upstream_calls.append(resource_type)
+    time.sleep(0.1)
+    return [{'id': 1, 'type': resource_type}]
+
+
+@cachify_many('test_cachify/get_resource_list_{resource_type}', items_arg='resource_types', item_arg='resource_type')
+def _get_resource_lists(resource_types):
+    upstream_calls.append(resource_types)
+    return dict((resource_type, [{'id': 1, 'type': resource_type}]) for resource_type in resource_types if resource_type != 'unknown')
+
+
+class TestCachifyMany:
+
+    def test_misses_only(self, app):
+        """Bulk loader is called once, with misses only, and shares cache keys with the per-item function."""
+        upstream_calls.clear()
+        keys = [f'test_cachify/get_resource_list_{resource_type}' for resource_type in ['room', 'screen', 'unknown']]
+        try:
+            assert _get_resource_list('room') == [{'id': 1, 'type': 'room'}]
+            expected = {
+                'room': [{'id': 1, 'type': 'room'}],
+                'screen': [{'id': 1, 'type': 'screen'}],
+                'unknown': None,
+            }
+            assert _get_resource_lists(['screen', 'room', 'unknown', 'screen']) == expected
+            assert _get_resource_lists(['room', 'screen', 'unknown']) == expected
+            assert _get_resource_lists([]) == {}
+            assert _get_resource_list('unknown') is None
+            assert upstream_calls == ['room', ['screen', 'unknown']]
+        finally:
+            for key in keys:
+                cache.delete(key)
+
+
+class TestSingleFlight:
+
+    def test_concurrent_misses(self, app):
+        """Concurrent misses of the same key make one upstream call and get their own copies of its result."""
+        thread_count = 8
+        barrier = Barrier(thread_count)
+
+        def _get(resource_type):
+            with app.app_context():
+                barrier.wait()
+                return _get_resource_list(resource_type)
+
+        upstream_calls.clear()
+        key = 'test_cachify/get_resource_list_room'
+        try:
+            for lock_timeout in [None, 5]:
+                cache.delete(key)
+                with override_config(app, 'CACHE_SINGLE_FLIGHT_LOCK_TIMEOUT', lock_timeout):
+                    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+                        results = list(executor.map(_get, ['room'] * thread_count))
+                assert all(result == [{'id': 1, 'type': 'room'}] for result in results)
+                assert len(set(id(result) for result in results)) == thread_count
+                assert cache.get(f'cachify_lock/{key}') is None
+            assert upstream_calls == ['room', 'room']
+        finally:
+            cache.delete(key)
+
+    def test_stale_lock(self, app):
+        """A lock left behind by a process that died mid-compute does not hold up misses once it expires."""
+        upstream_calls.clear()
+        key = 'test_cachify/get_resource_list_room'
+        lock_key = f'cachify_lock/{key}'
+        try:
+            cache.delete(key)
+            cache.set(lock_key, True, timeout=1)
+            time.sleep(1.1)
+            with override_config(app, 'CACHE_SINGLE_FLIGHT_LOCK_TIMEOUT', 5):
+                start = time.monotonic()
+                assert _get_resource_list('room') == [{'id': 1, 'type': 'room'}]
+                assert time.monotonic() - start < 1
+            assert upstream_calls == ['room']
+            assert cache.get(lock_key) is None
+        finally:
+            cache.delete(key)
+            cache.delete(lock_key)
@@ -0,0 +1,91 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+import time
+
+from diablo.lib.tiered_cache import TieredCache
+from flask_caching.backends import SimpleCache
+
+
+def _tiered_cache(max_size=2, timeout=60):
+    return TieredCache(
+        shared=SimpleCache(),
+        local_tiers={'user_for_uid_{uid}': {'max_size': max_size, 'timeout': timeout}},
+    )
+
+
+class TestTieredCache:
+
+    def test_hit_is_a_copy(self):
+        """Callers can mutate what they get without corrupting the cache."""
+        cache = _tiered_cache()
+        user = {'uid': '1', 'courses': []}
+        cache.set('user_for_uid_1', user)
+        user['courses'].append('mutated by caller')
+        cached = cache.get('user_for_uid_1')
+        cached['courses'].append('mutated by caller')
+        assert cache.get('user_for_uid_1') == {'uid': '1', 'courses': []}
+
+    def test_local_tier(self):
+        """Matching keys are served in-process until evicted (LRU) or deleted. Other keys go to the shared backend."""
+        cache = _tiered_cache(max_size=2)
+        cache.set_many({'user_for_uid_1': 1, 'user_for_uid_2': 2, 'course_feed': 'feed'})
+        cache.shared.clear()
+        assert cache.get_many('user_for_uid_1', 'user_for_uid_2', 'course_feed') == [1, 2, None]
+        assert cache.get('user_for_uid_1') == 1
+        cache.set('user_for_uid_3', 3)
+        # The least recently used key was evicted.
+        assert cache.get_many('user_for_uid_1', 'user_for_uid_2', 'user_for_uid_3') == [1, None, 3]
+        cache.delete('user_for_uid_1')
+        assert cache.get('user_for_uid_1') is None
+
+    def test_local_timeout(self):
+        """Local entries expire per the local timeout, after which writes by other processes are visible."""
+        cache = _tiered_cache(timeout=0.05)
+        cache.set('user_for_uid_1', 'stale')
+        # Another process writes to the shared backend.
+        cache.shared.set('user_for_uid_1', 'fresh')
+        assert cache.get('user_for_uid_1') == 'stale'
+        time.sleep(0.06)
+        assert cache.get('user_for_uid_1') == 'fresh'
+
+    def test_namespace(self):
+        """Deploys with different namespaces share a backend without seeing each other's entries."""
+        shared = SimpleCache()
+        previous_deploy = TieredCache(shared=shared, local_tiers={}, namespace='previous')
+        current_deploy = TieredCache(shared=shared, local_tiers={}, namespace='current')
+        previous_deploy.set('canvas/canvas_course_sites', 'previous')
+        assert current_deploy.get('canvas/canvas_course_sites') is None
+        current_deploy.set('canvas/canvas_course_sites', 'current')
+        assert previous_deploy.get('canvas/canvas_course_sites') == 'previous'
+        assert shared.get('current/canvas/canvas_course_sites') == 'current'
+
+    def test_delete_many(self):
+        """Every key is deleted, even if a preceding key was not found."""
+        cache = _tiered_cache()
+        cache.set_many({'user_for_uid_2': 2, 'course_feed': 'feed'})
+        assert cache.delete_many('user_for_uid_1', 'user_for_uid_2', 'course_feed') is False
+        assert cache.get_many('user_for_uid_2', 'course_feed') == [None, None]
+        assert cache.shared.get('course_feed') is None
@@ -0,0 +1,143 @@
+"""
+Copyright ©2020. The Regents of the University of California (Regents). All Rights Reserved.
+
+Permission to use, copy, modify, and distribute this software and its documentation
+for educational, research, and not-for-profit purposes, without fee and without a
+signed licensing agreement, is hereby granted, provided that the above copyright
+notice, this paragraph and the following two paragraphs appear in all copies,
+modifications, and distributions.
+
+Contact The Office of Technology Licensing, UC Berkeley, 2150 Shattuck Avenue,
+Suite 510, Berkeley, CA 94720-1620, (510) 643-7201, otl@berkeley.edu,
+http://ipira.berkeley.edu/industry-info for commercial licensing opportunities.
+
+IN NO EVENT SHALL REGENTS BE LIABLE TO ANY PARTY FOR DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING LOST PROFITS, ARISING OUT OF
+THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION, EVEN IF REGENTS HAS BEEN ADVISED
+OF THE POSSIBILITY OF SUCH DAMAGE.
+
+REGENTS SPECIFICALLY DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+SOFTWARE AND ACCOMPANYING DOCUMENTATION, IF ANY, PROVIDED HEREUNDER IS PROVIDED
+"AS IS". REGENTS HAS NO OBLIGATION TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+ENHANCEMENTS, OR MODIFICATIONS.
+"""
+
+from diablo import cache
+from diablo.externals.calnet import Client, ConnectionPool
+from diablo.merged import calnet
+from flask import current_app as app
+import ldap3
+from ldap3.core.exceptions import LDAPCommunicationError
+from tests.util import override_config
+
+departed_uid = '10000001'
+known_uid = '10000002'
+
+
+class TestNegativeCaching:
+
+    def test_unknown_uid_is_cached(self, monkeypatch):
+        """CalNet is searched once per unknown uid, until the negative timeout expires."""
+        searches = []
+        monkeypatch.setattr(calnet, '_search_calnet_users', lambda app_, id_type, ids: searches.append(ids) or {})
+        try:
+            for _ in range(2):
+                user = calnet.get_calnet_user_for_uid(app, departed_uid)
+                assert user['uid'] == departed_uid
+                assert user['isExpiredPerLdap'] is None
+                assert calnet.get_cached_calnet_users_for_uids(app, [departed_uid]) == {departed_uid: user}
+            assert searches == [[departed_uid]]
+        finally:
+            cache.delete(f'calnet/user_for_uid_{departed_uid}')
+
+    def test_negative_timeout_per_key_pattern(self, monkeypatch):
+        """CACHE_TIMEOUTS overrides timeouts per key pattern. No negative timeout, no negative caching."""
+        searches = []
+        monkeypatch.setattr(
+            calnet,
+            '_search_calnet_users',
+            lambda app_, id_type, ids: searches.append(ids) or dict((uid, {'uid': uid}) for uid in ids if uid == known_uid),
+        )
+        timeouts = {'calnet/user_for_uid_{uid}': {'negative_timeout': None}}
+        try:
+            with override_config(app, 'CACHE_TIMEOUTS', timeouts):
+                for _ in range(2):
+                    users = calnet.get_cached_calnet_users_for_uids(app, [departed_uid, known_uid])
+                    assert users[known_uid] == {'uid': known_uid}
+                    assert users[departed_uid]['uid'] == departed_uid
+            assert searches == [[departed_uid, known_uid], [departed_uid]]
+        finally:
+            for uid in [departed_uid, known_uid]:
+                cache.delete(f'calnet/user_for_uid_{uid}')
+
+
+class TestConnectionPool:
+
+    def test_acquire_and_release(self):
+        """Released connections are reused, up to the size of the pool. The rest are unbound."""
+        pool = ConnectionPool(connect=_mock_connect(), size=1, idle_timeout=300)
+        with pool.connection() as first:
+            with pool.connection() as second:
+                assert first is not second
+        # The pool was full by the time the first connection was released.
+        assert second.bound
+        assert not first.bound
+        with pool.connection() as conn:
+            assert conn is second
+
+    def test_idle_timeout(self):
+        """Connections idle for longer than the idle timeout are unbound rather than reused."""
+        pool = ConnectionPool(connect=_mock_connect(), size=1, idle_timeout=0)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as conn:
+            assert conn is not first
+        assert not first.bound
+
+    def test_failed_connection_is_discarded(self):
+        """A connection that fails mid-operation is unbound, not returned to the pool."""
+        pool = ConnectionPool(connect=_mock_connect(), size=1, idle_timeout=300)
+        try:
+            with pool.connection() as conn:
+                raise LDAPCommunicationError('Connection reset by peer')
+        except LDAPCommunicationError:
+            pass
+        assert not conn.bound
+        with pool.connection() as fresh_conn:
+            assert fresh_conn is not conn
+
+    def test_retry_on_fresh_connection(self):
+        """After a communication error, stale idle connections are dropped and the search is retried once."""
+        connect = _mock_connect()
+        calnet_client = Client(app)
+        calnet_client.pool = ConnectionPool(connect=connect, size=2, idle_timeout=300)
+        stale_connections = []
+        for _ in range(2):
+            stale_conn = connect()
+
+            def _search(*args, **kwargs):
+                raise LDAPCommunicationError('Connection reset by peer')
+            stale_conn.search = _search
+            stale_connections.append(stale_conn)
+        for stale_conn in stale_connections:
+            calnet_client.pool._release(stale_conn)
+        users = calnet_client.search_uids([known_uid])
+        assert [user['uid'] for user in users] == [known_uid]
+        assert not any(stale_conn.bound for stale_conn in stale_connections)
+
+
+def _mock_connect():
+    # A directory of one person, served by ldap3's mock strategy. Connections share the server and thus its entries.
+    server = ldap3.Server('calnet-mock', get_info=ldap3.NONE)
+
+    def _connect():
+        conn = ldap3.Connection(server, user='cn=bind', password='secret', client_strategy=ldap3.MOCK_SYNC)
+        conn.strategy.add_entry('cn=bind', {'userPassword': 'secret'})
+        conn.strategy.add_entry(
+            f'uid={known_uid},ou=people,dc=berkeley,dc=edu',
+            {'displayName': 'Ada Lovelace', 'objectClass': ['person'], 'ou': 'people', 'uid': known_uid},
+        )
+        conn.bind()
+        return conn
+    return _connect
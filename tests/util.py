@@ -25,7 +25,9 @@ ENHANCEMENTS, OR MODIFICATIONS.
 from contextlib import contextmanager
 
 from diablo import db
-from sqlalchemy import text
+from diablo.models.course_status import CourseStatus
+from diablo.models.term_version import TermVersion
+from sqlalchemy import event, text
 
 
 @contextmanager
@@ -39,6 +41,22 @@ def override_config(app, key, value):
         app.config[key] = old_value
 
 
+@contextmanager
+def count_queries():
+    """Count SQL statements executed within the block."""
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.session.get_bind()
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
+
+
 @contextmanager
 def test_approvals_workflow(app):
     """Delete all approvals before and after test."""
@@ -47,6 +65,9 @@ def test_approvals_workflow(app):
         db.session.execute(text('DELETE FROM course_preferences'))
         db.session.execute(text('DELETE FROM scheduled'))
         db.session.execute(text('DELETE FROM sent_emails'))
+        CourseStatus.refresh(term_id=app.config['CURRENT_TERM_ID'])
+        # As at the end of a request or job.
+        TermVersion.flush_bumps()
 
     try:
         _delete_all_approvals()